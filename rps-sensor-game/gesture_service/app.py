@@ -1,13 +1,34 @@
 import os
+import sys
+import hmac
+import atexit
 import logging
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import cv2
-import mediapipe as mp
+from flask_sock import Sock
 import numpy as np
 import base64
-from enhanced_gesture_detector import EnhancedGestureDetector
+import struct
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial, wraps
+from frame_gate import FrameGate
+from frame_ingest import IngestError, decode_frame, read_buffer
+from gesture_smoothing import SmootherRegistry
+from gesture_stream import GestureStream, StreamMetrics
+from inference_workers import FrameTooLarge, InferenceWorkerPool
+import service_metrics
+from landmark_cache import LandmarkCache
+from landmark_log import LandmarkLog
+from landmark_features import compute_features, landmarks_to_array, parse_landmarks
+from player_slots import PlayerSlots
+from quality_hints import QualityController
+from tracker_pool import TrackerPool
 from datetime import datetime
+from multiprocessing.util import Finalize
 
 # Configure logging
 logging.basicConfig(
@@ -22,28 +43,148 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
 
-# Initialize MediaPipe
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+# Packed float32 landmarks sent instead of an image
+LANDMARKS_MIMETYPE = 'application/x-landmarks'
+
+# One tracker per player session so tracking state never crosses players
+DEFAULT_SESSION_ID = 'default'
+tracker_pool = TrackerPool(
+    max_size=int(os.environ.get('TRACKER_POOL_SIZE', 16)),
+    idle_timeout=float(os.environ.get('TRACKER_IDLE_TIMEOUT', 300))
+)
+
+# Multi-player sessions track up to MAX_PLAYERS hands with one tracker
+MAX_PLAYERS = int(os.environ.get('MAX_PLAYERS', 2))
+PLAYER_MAX_DISTANCE = float(os.environ.get('PLAYER_MAX_DISTANCE', 0.35))
+player_tracker_pool = TrackerPool(
+    max_size=int(os.environ.get('TRACKER_POOL_SIZE', 16)),
+    idle_timeout=float(os.environ.get('TRACKER_IDLE_TIMEOUT', 300)),
+    factory=partial(TrackerPool._create_tracker, max_num_hands=MAX_PLAYERS)
+)
+
+# Near-duplicate frames reuse the last landmarks instead of running detection
+frame_gate = FrameGate(
+    diff_threshold=float(os.environ.get('FRAME_DIFF_THRESHOLD', 2.0)),
+    max_skips=int(os.environ.get('MAX_SKIPPED_FRAMES', 5))
 )
 
-# Initialize detector
-detector = EnhancedGestureDetector()
+# Repeated poses hit a cache keyed on quantized, normalized landmarks
+GESTURE_CACHE_SIZE = int(os.environ.get('GESTURE_CACHE_SIZE', 4096))
+GESTURE_CACHE_TOLERANCE = float(os.environ.get('GESTURE_CACHE_TOLERANCE', 0.05))
+gesture_cache = (LandmarkCache(GESTURE_CACHE_SIZE, GESTURE_CACHE_TOLERANCE)
+                 if GESTURE_CACHE_SIZE > 0 else None)
+
+# Every classified landmark set can be appended to a binary log that
+# later serves as a training corpus or benchmark input
+landmark_log = None
+if os.environ.get('LANDMARK_LOG_PATH'):
+    landmark_log = LandmarkLog(os.environ['LANDMARK_LOG_PATH'])
+    # Finalizers also run when inference worker processes exit, unlike atexit
+    Finalize(landmark_log, landmark_log.close, exitpriority=10)
+
+# 'rules' classifies landmarks with the geometric rules below, 'ml' with
+# EnhancedGestureDetector, whose concurrent calls are micro-batched
+GESTURE_CLASSIFIER = os.environ.get('GESTURE_CLASSIFIER', 'rules')
+ML_BATCH_SIZE = int(os.environ.get('ML_BATCH_SIZE', 32))
+ML_BATCH_WAIT_MS = float(os.environ.get('ML_BATCH_WAIT_MS', 2))
+
+# JPEGs can be decoded straight to 1/2, 1/4 or 1/8 resolution
+DECODE_REDUCTION = int(os.environ.get('DECODE_REDUCTION', 1))
+
+# Responses tell clients how big and how often to send frames under load,
+# and frames larger than the current hint are shrunk before detection
+quality = QualityController(
+    target_ms=float(os.environ.get('QUALITY_TARGET_MS', 50)),
+    capacity=int(os.environ.get('QUALITY_CAPACITY', 4))
+) if os.environ.get('QUALITY_HINTS', '1') == '1' else None
+
+# cv2.imdecode releases the GIL, so batch frames decode in parallel
+MAX_BATCH_FRAMES = int(os.environ.get('MAX_BATCH_FRAMES', 64))
+decode_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('DECODE_WORKERS', 4)))
+
+# Streaming connections keep only the newest frames per player
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 1))
+stream_metrics = StreamMetrics()
+
+# Per-session temporal smoothing; a gesture commits once it is stable
+smoothers = SmootherRegistry(
+    alpha=float(os.environ.get('SMOOTHING_ALPHA', 0.5)),
+    commit_frames=int(os.environ.get('COMMIT_FRAMES', 3)),
+    commit_ms=float(os.environ.get('COMMIT_MS', 300))
+)
+
+# With INFERENCE_WORKERS > 0, frames are processed in a pool of worker
+# processes that each own their trackers; sessions stick to one worker
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0))
+worker_pool = None
+
+# The ML detector loads MediaPipe (and TensorFlow once training starts), so it
+# is only built when first needed
+_detector = None
+_detector_lock = threading.Lock()
+
+# Set once the service can answer /detect; optionally after a warmup frame
+GESTURE_WARMUP = os.environ.get('GESTURE_WARMUP', '0') == '1'
+WARMUP_SESSION_ID = '__warmup__'
+service_ready = threading.Event()
+
+def get_detector():
+    """Return the shared EnhancedGestureDetector, building it on first use."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                from enhanced_gesture_detector import EnhancedGestureDetector
+                model_store = None
+                if os.environ.get('MODEL_DIR'):
+                    from model_store import ModelStore
+                    model_store = ModelStore(os.environ['MODEL_DIR'],
+                                             keep=int(os.environ.get('MODEL_KEEP', 10)))
+                _detector = EnhancedGestureDetector(
+                    os.environ.get('GESTURE_CLASSIFIER_PATH'), model_store,
+                    reload_interval=float(os.environ.get('MODEL_POLL_INTERVAL', 5)),
+                    cache_size=GESTURE_CACHE_SIZE, cache_tolerance=GESTURE_CACHE_TOLERANCE,
+                    landmark_log=landmark_log,
+                    batch_size=ML_BATCH_SIZE, batch_wait_ms=ML_BATCH_WAIT_MS,
+                    on_batch=service_metrics.observe_batch
+                )
+    return _detector
+
+def warm_up():
+    """Load MediaPipe and run a blank frame through it before reporting ready."""
+    try:
+        start = time.perf_counter()
+        blank_frame = np.zeros((240, 320, 3), np.uint8)
+        if worker_pool is not None:
+            worker_pool.warm_up(blank_frame, WARMUP_SESSION_ID)
+        else:
+            process_frame(blank_frame, WARMUP_SESSION_ID)
+            tracker_pool.release(WARMUP_SESSION_ID)
+        logger.info(f"Gesture service warmed up in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"Warmup failed: {str(e)}")
+    finally:
+        service_ready.set()
 
 def init_gesture_service():
-    """Initialize the gesture service and verify dependencies."""
+    """Initialize the gesture service; heavy components load on first use."""
+    global worker_pool
     try:
-        # Test camera access
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            logger.error("Failed to access camera")
-            return False
-        cap.release()
+        if INFERENCE_WORKERS > 0:
+            worker_pool = InferenceWorkerPool(
+                process_frame, release_tracker,
+                num_workers=INFERENCE_WORKERS,
+                slots_per_worker=int(os.environ.get('WORKER_FRAME_SLOTS', 4))
+            )
+            atexit.register(worker_pool.shutdown)
+            logger.info(f"Started {INFERENCE_WORKERS} inference worker processes")
+
+        if GESTURE_WARMUP:
+            threading.Thread(target=warm_up, name='warmup', daemon=True).start()
+        else:
+            service_ready.set()
         
         logger.info("Gesture service initialized successfully")
         return True
@@ -51,217 +192,415 @@ def init_gesture_service():
         logger.error(f"Failed to initialize gesture service: {str(e)}")
         return False
 
-def process_frame(frame):
-    """Process a single frame and detect hand gesture."""
+@app.before_request
+def start_request_metrics():
+    if service_metrics.METRICS_ENABLED:
+        g.request_start = time.perf_counter()
+        service_metrics.IN_FLIGHT.inc()
+
+@app.teardown_request
+def finish_request_metrics(exc=None):
+    start = g.pop('request_start', None)
+    if start is not None:
+        service_metrics.IN_FLIGHT.dec()
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        service_metrics.REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+
+def collect_service_metrics():
+    """Point-in-time values owned by other components, read on each scrape."""
+    values = {
+        'gesture_active_sessions': ('gauge', 'Sessions holding a hand tracker', len(tracker_pool)),
+        'gesture_training_queue_depth': (
+            'gauge', 'Samples waiting for the next training round',
+            _detector.replay_buffer.pending if _detector is not None else 0)
+    }
+    if gesture_cache is not None:
+        cache_stats = gesture_cache.stats()
+        values['gesture_cache_entries'] = ('gauge', 'Entries in the landmark result cache', cache_stats['size'])
+        for name in ('hits', 'misses', 'evictions'):
+            values[f'gesture_cache_{name}'] = ('counter', f'Landmark result cache {name}', cache_stats[name])
+    if quality is not None:
+        values['gesture_quality_level'] = ('gauge', 'Current capture quality hint level, 0 is full quality', quality.level)
+        values['gesture_frame_latency_ema_ms'] = ('gauge', 'Smoothed frame latency behind the quality hints', quality.latency_ms)
+    for name, value in frame_gate.stats.items():
+        values[f'gesture_frame_gate_{name}_frames'] = ('counter', f'Frames handled by the frame gate as {name}', value)
+    for name, value in stream_metrics.snapshot().items():
+        kind = 'gauge' if name == 'active_connections' else 'counter'
+        values[f'gesture_stream_{name}'] = (kind, f'Stream {name.replace("_", " ")}', value)
+    return values
+
+if service_metrics.METRICS_ENABLED:
+    service_metrics.register_collector(collect_service_metrics)
+
+def get_request_landmarks():
+    """Return client-computed landmarks from the request, or None if it carries an image.
+
+    Raises ValueError for a malformed landmark payload.
+    """
+    if request.mimetype == LANDMARKS_MIMETYPE:
+        return parse_landmarks(request.get_data())
+    if request.is_json and 'landmarks' in (request.get_json(silent=True) or {}):
+        return parse_landmarks(request.get_json()['landmarks'])
+    return None
+
+def get_session_id():
+    """Read the player session id from the request, falling back to a shared default."""
+    session_id = (request.headers.get('X-Session-Id')
+                  or request.form.get('session_id')
+                  or request.args.get('session_id'))
+    if not session_id and request.is_json:
+        session_id = (request.get_json(silent=True) or {}).get('session_id')
+    return session_id or DEFAULT_SESSION_ID
+
+def process_frame(frame, session_id=DEFAULT_SESSION_ID, color='bgr', timings=None):
+    """Process a single frame and detect hand gesture.
+
+    ``color`` is the channel order of ``frame``. Stage durations in
+    milliseconds are added to ``timings`` when given, and
+    ``timings['reused']`` is set when the frame gate carried the previous
+    landmarks over instead of running detection.
+    """
+    timings = {} if timings is None else timings
     try:
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process the frame and detect hands
-        results = hands.process(rgb_frame)
+        # Process the frame with this session's tracker, skipping static scenes
+        with tracker_pool.session(session_id) as (hands, state):
+            points, reused = frame_gate.detect(hands, frame, state, color, timings)
+        if reused:
+            timings['reused'] = True
         
-        if not results.multi_hand_landmarks:
+        if points is None:
             return None, "No hand detected"
-            
-        # Get hand landmarks
-        hand_landmarks = results.multi_hand_landmarks[0]
         
         # Determine gesture based on landmark positions
-        gesture, confidence = determine_gesture(hand_landmarks)
-        
+        gesture, confidence = classify_points(points, timings)
+        # Only freshly detected landmarks are logged, not reused copies
+        if landmark_log is not None and not reused:
+            landmark_log.append(points, gesture, confidence, session_id)
         return gesture, confidence
     except Exception as e:
         logger.error(f"Error processing frame: {str(e)}")
         return None, str(e)
 
+def classify_points(points, timings=None):
+    """Classify one hand's (21, 3) landmarks, reusing cached results for repeated poses."""
+    timings = {} if timings is None else timings
+    if GESTURE_CLASSIFIER == 'ml':
+        # The detector keeps its own cache and batches concurrent calls
+        start = time.perf_counter()
+        gesture, confidence = get_detector().classify_landmarks(points)
+        timings['classify_ms'] = (time.perf_counter() - start) * 1000
+        return gesture, confidence
+
+    def compute(points):
+        start = time.perf_counter()
+        features = compute_features(points)
+        computed = time.perf_counter()
+        gestures, confidences = classify_features(features)
+        timings['features_ms'] = (computed - start) * 1000
+        timings['classify_ms'] = (time.perf_counter() - computed) * 1000
+        return gestures[0], confidences[0]
+
+    if gesture_cache is None:
+        return compute(points)
+    return gesture_cache.get_or_compute(points, compute)
+
+def classify_point_batch(points, timings=None):
+    """Classify a list of (21, 3) landmark sets with the configured classifier.
+
+    Returns parallel lists of gestures and confidences. Sets already in the
+    rule cache are not recomputed; the rest are classified in one pass.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    if GESTURE_CLASSIFIER == 'ml':
+        gestures, confidences = get_detector().classify_landmark_batch(np.stack(points))
+        timings['classify_ms'] = (time.perf_counter() - start) * 1000
+        return gestures, confidences
+
+    def compute(batch):
+        begin = time.perf_counter()
+        features = compute_features(np.stack(batch))
+        computed = time.perf_counter()
+        gestures, confidences = classify_features(features)
+        timings['features_ms'] = (computed - begin) * 1000
+        timings['classify_ms'] = (time.perf_counter() - computed) * 1000
+        return list(zip(gestures, confidences))
+
+    results = (compute(points) if gesture_cache is None
+               else gesture_cache.get_or_compute_many(points, compute))
+    return [gesture for gesture, _ in results], [confidence for _, confidence in results]
+
+def process_players(frame, session_id=DEFAULT_SESSION_ID, color='bgr', timings=None):
+    """Detect every player's hand in one frame and classify them together.
+
+    Returns one dict per player slot with ``player`` (1-based),
+    ``hand_detected``, ``handedness``, ``gesture`` and ``confidence``;
+    empty slots have a ``None`` gesture. ``timings['reused']`` is set as in
+    ``process_frame``.
+    """
+    timings = {} if timings is None else timings
+    with player_tracker_pool.session(session_id) as (hands, state):
+        detected, reused = frame_gate.detect_hands(hands, frame, state, color, timings)
+        if reused:
+            timings['reused'] = True
+        slots = state.get('players')
+        if slots is None:
+            slots = state['players'] = PlayerSlots(MAX_PLAYERS, PLAYER_MAX_DISTANCE)
+        assigned = slots.assign(detected)
+
+    gestures, confidences = [], []
+    if detected:
+        gestures, confidences = classify_point_batch([points for points, _ in detected], timings)
+
+    players = []
+    for slot, index in enumerate(assigned):
+        if index is None:
+            players.append({'player': slot + 1, 'hand_detected': False, 'handedness': None,
+                            'gesture': None, 'confidence': 0.0})
+        else:
+            if landmark_log is not None and not reused:
+                landmark_log.append(detected[index][0], gestures[index], confidences[index],
+                                    player_session_id(session_id, slot + 1))
+            players.append({'player': slot + 1, 'hand_detected': True,
+                            'handedness': detected[index][1],
+                            'gesture': gestures[index], 'confidence': confidences[index]})
+    return players
+
+def player_session_id(session_id, player):
+    """Smoothing key for one player of a multi-player session."""
+    return f'{session_id}#p{player}'
+
+def release_tracker(session_id):
+    """Drop a session's tracker in this process."""
+    tracker_pool.release(session_id)
+
+def run_frame(frame, session_id=DEFAULT_SESSION_ID, color='bgr', timings=None):
+    """Process a frame in the worker pool when enabled, otherwise in-process."""
+    timings = {} if timings is None else timings
+    if worker_pool is not None:
+        gesture, confidence = worker_pool.process(frame, session_id, color, timings)
+    else:
+        gesture, confidence = process_frame(frame, session_id, color, timings)
+    service_metrics.observe_timings(timings)
+    service_metrics.record_outcome(gesture, confidence)
+    return gesture, confidence
+
+def run_frames(frames, session_id=DEFAULT_SESSION_ID, reused=None):
+    """Process a batch of frames in the worker pool when enabled, otherwise in-process.
+
+    ``reused`` is filled as in ``process_frames``.
+    """
+    reused = [] if reused is None else reused
+    if worker_pool is None:
+        results = process_frames(frames, session_id, reused)
+        for gesture, confidence in results:
+            service_metrics.record_outcome(gesture, confidence)
+        return results
+
+    # Frames queue in order on the session's worker, keeping tracking continuity
+    futures = [worker_pool.submit(frame, session_id) if frame is not None else None
+               for frame in frames]
+    results = []
+    for future in futures:
+        if future is None:
+            results.append((None, "Invalid image data"))
+            reused.append(False)
+        else:
+            gesture, confidence, timings = future.result(worker_pool.timeout)
+            service_metrics.observe_timings(timings)
+            results.append((gesture, confidence))
+            reused.append(timings.get('reused', False))
+    for gesture, confidence in results:
+        service_metrics.record_outcome(gesture, confidence)
+    return results
+
+def process_frames(frames, session_id=DEFAULT_SESSION_ID, reused=None):
+    """Detect hands in a sequence of frames and classify them in one pass.
+
+    Frames are run through the session's tracker in order so tracking
+    continuity is kept across the batch. Returns one ``(gesture, confidence)``
+    pair per frame, with the same conventions as ``process_frame``. When
+    ``reused`` is a list, one flag per frame is appended telling whether the
+    frame gate carried the previous landmarks over.
+    """
+    results = [(None, "No hand detected")] * len(frames)
+    flags = [False] * len(frames)
+    detected_indices = []
+    detected_points = []
+
+    with tracker_pool.session(session_id) as (hands, state):
+        for i, frame in enumerate(frames):
+            if frame is None:
+                results[i] = (None, "Invalid image data")
+                continue
+            try:
+                points, flags[i] = frame_gate.detect(hands, frame, state)
+            except Exception as e:
+                logger.error(f"Error processing frame: {str(e)}")
+                results[i] = (None, str(e))
+                continue
+            if points is not None:
+                detected_indices.append(i)
+                detected_points.append(points)
+
+    if detected_points:
+        gestures, confidences = classify_point_batch(detected_points)
+        for i, points, gesture, confidence in zip(detected_indices, detected_points,
+                                                   gestures, confidences):
+            results[i] = (gesture, confidence)
+            if landmark_log is not None and not flags[i]:
+                landmark_log.append(points, gesture, confidence, session_id)
+
+    if reused is not None:
+        reused.extend(flags)
+    return results
+
+def aggregate_gestures(results):
+    """Combine per-frame results into one gesture by confidence-weighted vote."""
+    votes = defaultdict(list)
+    for gesture, confidence in results:
+        if gesture is not None:
+            votes[gesture].append(confidence)
+
+    if not votes:
+        return None, 0.0, 0
+
+    gesture = max(votes, key=lambda g: sum(votes[g]))
+    return gesture, float(np.mean(votes[gesture])), len(votes[gesture])
+
+def split_frame_stream(data):
+    """Split a binary body of length-prefixed frames (uint32 big-endian size + bytes)."""
+    buffers = []
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        if offset + 4 > len(view):
+            raise ValueError("Truncated frame header")
+        (size,) = struct.unpack_from('>I', view, offset)
+        offset += 4
+        if offset + size > len(view):
+            raise ValueError("Truncated frame data")
+        buffers.append(view[offset:offset + size])
+        offset += size
+    return buffers
+
+def decode_frames(buffers):
+    """Decode a group of encoded images in parallel; undecodable frames become None."""
+    def decode(buffer):
+        try:
+            return decode_frame(buffer, reduction=DECODE_REDUCTION)[0]
+        except IngestError:
+            return None
+    return list(decode_executor.map(decode, buffers))
+
 def determine_gesture(landmarks):
     """Determine the RPS gesture from hand landmarks with improved accuracy."""
     try:
-        # Calculate key angles and distances
-        finger_states = calculate_finger_states(landmarks)
-        hand_orientation = calculate_hand_orientation(landmarks)
-        confidence_score = 0.0
-
-        # Rock detection (closed fist)
-        if sum(finger_states) <= 1:
-            confidence_score = calculate_rock_confidence(finger_states, hand_orientation)
-            if confidence_score > 0.7:
-                return "rock", confidence_score
-
-        # Scissors detection (two fingers extended)
-        if (finger_states[1] and finger_states[2] and 
-            not any(finger_states[3:]) and 
-            check_scissors_angle(landmarks)):
-            confidence_score = calculate_scissors_confidence(landmarks)
-            if confidence_score > 0.7:
-                return "scissors", confidence_score
-
-        # Paper detection (all fingers extended)
-        if all(finger_states[1:]):
-            confidence_score = calculate_paper_confidence(landmarks, hand_orientation)
-            if confidence_score > 0.7:
-                return "paper", confidence_score
-
-        return None, 0.0
-
+        gestures, confidences = determine_gestures(landmarks_to_array(landmarks))
+        return gestures[0], confidences[0]
     except Exception as e:
         logger.error(f"Error determining gesture: {str(e)}")
         raise
 
-def calculate_finger_states(landmarks):
-    """Calculate extended state of each finger with improved accuracy."""
-    finger_states = []
-    
-    # Thumb calculation (special case)
-    thumb_angle = calculate_angle(
-        landmarks.landmark[mp_hands.HandLandmark.THUMB_CMC],
-        landmarks.landmark[mp_hands.HandLandmark.THUMB_MCP],
-        landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP]
-    )
-    finger_states.append(thumb_angle > 150)
-
-    # Other fingers
-    finger_landmarks = [
-        (mp_hands.HandLandmark.INDEX_FINGER_MCP, mp_hands.HandLandmark.INDEX_FINGER_PIP, mp_hands.HandLandmark.INDEX_FINGER_TIP),
-        (mp_hands.HandLandmark.MIDDLE_FINGER_MCP, mp_hands.HandLandmark.MIDDLE_FINGER_PIP, mp_hands.HandLandmark.MIDDLE_FINGER_TIP),
-        (mp_hands.HandLandmark.RING_FINGER_MCP, mp_hands.HandLandmark.RING_FINGER_PIP, mp_hands.HandLandmark.RING_FINGER_TIP),
-        (mp_hands.HandLandmark.PINKY_MCP, mp_hands.HandLandmark.PINKY_PIP, mp_hands.HandLandmark.PINKY_TIP)
-    ]
+def determine_gestures(points):
+    """Classify a (21, 3) or (N, 21, 3) landmark array in one vectorized pass.
+
+    Returns parallel lists of gestures (``None`` when unrecognized) and
+    confidence scores.
+    """
+    return classify_features(compute_features(points))
+
+def classify_features(features):
+    """Apply the rock/paper/scissors rules to output of ``compute_features``."""
+    finger_states = calculate_finger_states(features['finger_angles'])
+    extended_count = finger_states.sum(axis=1)
+    scissors_angle_ok = (features['scissors_angle'] > 10) & (features['scissors_angle'] < 40)
+    palm_normal = features['palm_normal']
+
+    # Rock detection (closed fist)
+    rock_confidence = calculate_rock_confidence(finger_states, palm_normal)
+    is_rock = (extended_count <= 1) & (rock_confidence > 0.7)
+
+    # Scissors detection (two fingers extended)
+    scissors_confidence = calculate_scissors_confidence(features, scissors_angle_ok)
+    is_scissors = (finger_states[:, 1] & finger_states[:, 2] &
+                   ~finger_states[:, 3:].any(axis=1) &
+                   scissors_angle_ok & (scissors_confidence > 0.7))
 
-    for mcp, pip, tip in finger_landmarks:
-        angle = calculate_angle(
-            landmarks.landmark[mcp],
-            landmarks.landmark[pip],
-            landmarks.landmark[tip]
-        )
-        finger_states.append(angle > 160)
-
-    return finger_states
-
-def calculate_angle(p1, p2, p3):
-    """Calculate angle between three points in 3D space."""
-    v1 = np.array([p1.x - p2.x, p1.y - p2.y, p1.z - p2.z])
-    v2 = np.array([p3.x - p2.x, p3.y - p2.y, p3.z - p2.z])
-    
-    cosine = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-    angle = np.arccos(np.clip(cosine, -1.0, 1.0))
-    return np.degrees(angle)
-
-def calculate_hand_orientation(landmarks):
-    """Calculate hand orientation relative to camera."""
-    wrist = landmarks.landmark[mp_hands.HandLandmark.WRIST]
-    middle_mcp = landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_MCP]
-    
-    # Calculate normal vector to palm
-    palm_normal = np.cross(
-        [middle_mcp.x - wrist.x, middle_mcp.y - wrist.y, middle_mcp.z - wrist.z],
-        [landmarks.landmark[mp_hands.HandLandmark.PINKY_MCP].x - wrist.x,
-         landmarks.landmark[mp_hands.HandLandmark.PINKY_MCP].y - wrist.y,
-         landmarks.landmark[mp_hands.HandLandmark.PINKY_MCP].z - wrist.z]
-    )
-    return palm_normal
-
-def check_scissors_angle(landmarks):
-    """Check if index and middle fingers form correct scissors angle."""
-    index_dir = np.array([
-        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP].x - 
-        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP].x,
-        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP].y -
-        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP].y
-    ])
-    
-    middle_dir = np.array([
-        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP].x -
-        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP].x,
-        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP].y -
-        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP].y
-    ])
-    
-    angle = np.degrees(np.arccos(np.clip(
-        np.dot(index_dir, middle_dir) / 
-        (np.linalg.norm(index_dir) * np.linalg.norm(middle_dir)),
-        -1.0, 1.0
-    )))
-    
-    return 10 < angle < 40
-
-def calculate_rock_confidence(finger_states, hand_orientation):
+    # Paper detection (all fingers extended)
+    paper_confidence = calculate_paper_confidence(features, palm_normal)
+    is_paper = finger_states[:, 1:].all(axis=1) & (paper_confidence > 0.7)
+
+    gestures = np.select([is_rock, is_scissors, is_paper],
+                         ['rock', 'scissors', 'paper'], default='')
+    confidences = np.select([is_rock, is_scissors, is_paper],
+                            [rock_confidence, scissors_confidence, paper_confidence], default=0.0)
+
+    return ([gesture or None for gesture in gestures.tolist()],
+            [float(confidence) for confidence in confidences])
+
+def calculate_finger_states(finger_angles):
+    """Calculate extended state of each finger from its middle-joint angle."""
+    # Thumb bends less than the other fingers when extended
+    thresholds = np.array([150, 160, 160, 160, 160])
+    return finger_angles > thresholds
+
+def calculate_rock_confidence(finger_states, palm_normal):
     """Calculate confidence score for rock gesture."""
-    closed_finger_score = (5 - sum(finger_states)) / 5
-    orientation_score = abs(hand_orientation[1]) > 0.7
-    return (closed_finger_score * 0.7 + float(orientation_score) * 0.3)
+    closed_finger_score = (5 - finger_states.sum(axis=1)) / 5
+    orientation_score = np.abs(palm_normal[:, 1]) > 0.7
+    return closed_finger_score * 0.7 + orientation_score * 0.3
 
-def calculate_scissors_confidence(landmarks):
+def calculate_scissors_confidence(features, scissors_angle_ok):
     """Calculate confidence score for scissors gesture."""
-    # Check finger separation and orientation
-    index_tip = landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    middle_tip = landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-    
-    separation = np.sqrt(
-        (index_tip.x - middle_tip.x)**2 +
-        (index_tip.y - middle_tip.y)**2
-    )
-    
-    separation_score = min(1.0, separation * 5)
-    angle_score = float(check_scissors_angle(landmarks))
-    
-    return (separation_score * 0.6 + angle_score * 0.4)
-
-def calculate_paper_confidence(landmarks, hand_orientation):
+    # Index/middle tip separation is the first adjacent-tip distance
+    separation_score = np.minimum(1.0, features['tip_separations'][:, 0] * 5)
+    return separation_score * 0.6 + scissors_angle_ok * 0.4
+
+def calculate_paper_confidence(features, palm_normal):
     """Calculate confidence score for paper gesture."""
-    # Check finger separation and palm orientation
-    finger_tips = [
-        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP],
-        landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP],
-        landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]
-    ]
-    
-    # Calculate average finger separation
-    separations = []
-    for i in range(len(finger_tips)-1):
-        separation = np.sqrt(
-            (finger_tips[i].x - finger_tips[i+1].x)**2 +
-            (finger_tips[i].y - finger_tips[i+1].y)**2
-        )
-        separations.append(separation)
-    
-    avg_separation = np.mean(separations)
-    separation_score = min(1.0, avg_separation * 8)
-    orientation_score = abs(hand_orientation[2]) > 0.7
-    
-    return (separation_score * 0.6 + float(orientation_score) * 0.4)
-
-def calculate_distance(point1, point2):
-    """Calculate 3D distance between two points."""
-    return ((point1.x - point2.x) ** 2 + 
-            (point1.y - point2.y) ** 2 + 
-            (point1.z - point2.z) ** 2) ** 0.5
+    avg_separation = features['tip_separations'].mean(axis=1)
+    separation_score = np.minimum(1.0, avg_separation * 8)
+    orientation_score = np.abs(palm_normal[:, 2]) > 0.7
+    return separation_score * 0.6 + orientation_score * 0.4
 
 @app.route('/detect', methods=['POST'])
 def detect_gesture():
     """Endpoint to detect gesture from image data."""
     try:
-        # Get image data from request
-        if 'image' not in request.files:
-            return jsonify({'error': 'No image provided'}), 400
-            
-        image_file = request.files['image']
-        image_array = np.frombuffer(image_file.read(), np.uint8)
-        frame = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            return jsonify({'error': 'Invalid image data'}), 400
+        # Client-computed landmarks skip decoding and hand detection entirely
+        try:
+            points = get_request_landmarks()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if points is not None:
+            return detect_from_landmarks(points)
+
+        try:
+            frame, color, timings = read_request_frame()
+        except IngestError as e:
+            return jsonify({'error': str(e)}), 400
             
         # Process the frame
-        gesture, confidence = process_frame(frame)
+        session_id = get_session_id()
+        try:
+            with track_frame():
+                gesture, confidence = run_frame(frame, session_id, color, timings)
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        smoothed = smoothers.update(session_id, gesture, confidence if gesture else 0.0,
+                                    fresh=not timings.get('reused'))
         
         if confidence == 0.0:
-            return jsonify({'error': 'Gesture not recognized'}), 400
+            return jsonify({'error': 'Gesture not recognized', 'smoothed': smoothed,
+                            'hints': quality_hints()}), 400
             
         return jsonify({
             'gesture': gesture,
             'confidence': confidence,
+            'smoothed': smoothed,
+            'timings': timings,
+            'hints': quality_hints(),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -269,31 +608,320 @@ def detect_gesture():
         logger.error(f"Error processing request: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def read_request_frame():
+    """Read and decode the frame in the request, either an upload or a raw body.
+
+    Returns ``(frame, color, timings)``; raises IngestError when the
+    request carries no usable image.
+    """
+    start = time.perf_counter()
+    if request.mimetype == 'application/octet-stream':
+        buffer = read_buffer(request.stream, request.content_length)
+        frame_format = request.headers.get('X-Frame-Format', 'jpeg')
+        width = request.headers.get('X-Frame-Width', type=int)
+        height = request.headers.get('X-Frame-Height', type=int)
+    else:
+        if 'image' not in request.files:
+            raise IngestError('No image provided')
+        buffer = read_buffer(request.files['image'].stream)
+        frame_format, width, height = 'jpeg', None, None
+    timings = {'read_ms': (time.perf_counter() - start) * 1000}
+
+    frame, color, decode_timings = decode_frame(
+        buffer, frame_format, width, height, DECODE_REDUCTION)
+    timings.update(decode_timings)
+    if quality is not None:
+        frame = quality.downscale(frame, timings)
+    return frame, color, timings
+
+def track_frame():
+    """Context that feeds a frame's latency and concurrency into the quality hints."""
+    return quality.track() if quality is not None else nullcontext()
+
+def quality_hints():
+    """Current capture hints for clients, or None when hints are disabled."""
+    return quality.hints() if quality is not None else None
+
+def detect_from_landmarks(points):
+    """Classify landmarks sent by the client and build the /detect response."""
+    timings = {}
+    with track_frame():
+        gesture, confidence = classify_points(points, timings)
+    service_metrics.observe_timings(timings)
+    service_metrics.record_outcome(gesture, confidence)
+    session_id = get_session_id()
+    if landmark_log is not None:
+        landmark_log.append(points, gesture, confidence, session_id)
+    smoothed = smoothers.update(session_id, gesture, confidence)
+
+    if confidence == 0.0:
+        return jsonify({'error': 'Gesture not recognized', 'smoothed': smoothed,
+                        'hints': quality_hints()}), 400
+
+    return jsonify({
+        'gesture': gesture,
+        'confidence': confidence,
+        'smoothed': smoothed,
+        'timings': timings,
+        'hints': quality_hints(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/detect/players', methods=['POST'])
+def detect_players():
+    """Endpoint to detect every player's gesture in a single shared frame."""
+    try:
+        try:
+            frame, color, timings = read_request_frame()
+        except IngestError as e:
+            return jsonify({'error': str(e)}), 400
+
+        session_id = get_session_id()
+        with track_frame():
+            players = process_players(frame, session_id, color, timings)
+        service_metrics.observe_timings(timings)
+        for player in players:
+            if player['hand_detected']:
+                service_metrics.record_outcome(player['gesture'], player['confidence'])
+            player['smoothed'] = smoothers.update(
+                player_session_id(session_id, player['player']),
+                player['gesture'], player['confidence'] if player['gesture'] else 0.0,
+                fresh=not timings.get('reused'))
+
+        return jsonify({
+            'players': players,
+            'timings': timings,
+            'hints': quality_hints(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        logger.error(f"Error processing players request: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/detect/batch', methods=['POST'])
+def detect_gesture_batch():
+    """Endpoint to detect gestures over many frames in one request.
+
+    Accepts either multipart ``images`` files or an ``application/octet-stream``
+    body of length-prefixed frames.
+    """
+    try:
+        if request.mimetype == 'application/octet-stream':
+            try:
+                buffers = split_frame_stream(request.get_data())
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            buffers = [read_buffer(image_file.stream) for image_file in request.files.getlist('images')]
+
+        if not buffers:
+            return jsonify({'error': 'No images provided'}), 400
+        if len(buffers) > MAX_BATCH_FRAMES:
+            return jsonify({'error': f'Too many frames (max {MAX_BATCH_FRAMES})'}), 413
+
+        frames = decode_frames(buffers)
+        session_id = get_session_id()
+        reused = []
+        try:
+            results = run_frames(frames, session_id, reused)
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        gesture, confidence, votes = aggregate_gestures(results)
+        for (g, c), frame_reused in zip(results, reused):
+            smoothed = smoothers.update(session_id, g, c if g else 0.0, fresh=not frame_reused)
+
+        return jsonify({
+            'gesture': gesture,
+            'confidence': confidence,
+            'votes': votes,
+            'smoothed': smoothed,
+            'frame_count': len(frames),
+            'results': [
+                {'gesture': g, 'confidence': c} if g is not None
+                else {'gesture': None, 'confidence': 0.0,
+                      'error': c if isinstance(c, str) else 'Gesture not recognized'}
+                for g, c in results
+            ],
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        logger.error(f"Error processing batch request: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@sock.route('/stream')
+def stream_gestures(ws):
+    """WebSocket channel: binary JPEG frames in, gesture change events out."""
+    session_id = request.args.get('session_id') or DEFAULT_SESSION_ID
+
+    def classify(frame_bytes):
+        try:
+            frame, color, _ = decode_frame(frame_bytes, reduction=DECODE_REDUCTION)
+        except IngestError as e:
+            return None, str(e)
+        timings = {}
+        gesture, confidence = run_frame(frame, session_id, color, timings)
+        smoothed = smoothers.update(session_id, gesture, confidence if gesture else 0.0,
+                                    fresh=not timings.get('reused'))
+        return smoothed['gesture'], smoothed['confidence']
+
+    GestureStream(ws, classify, stream_metrics, STREAM_QUEUE_SIZE).run()
+
+@app.route('/stream/metrics', methods=['GET'])
+def stream_metrics_endpoint():
+    """Endpoint to report streaming connection and dropped-frame counters."""
+    return jsonify(stream_metrics.snapshot())
+
+@app.route('/session/<session_id>', methods=['DELETE'])
+def end_session(session_id):
+    """Endpoint to release a player's tracker when they leave."""
+    tracker_pool.release(session_id)
+    player_tracker_pool.release(session_id)
+    if worker_pool is not None:
+        worker_pool.release(session_id)
+    smoothers.release(session_id)
+    for player in range(1, MAX_PLAYERS + 1):
+        smoothers.release(player_session_id(session_id, player))
+    return jsonify({'success': True})
+
+@app.route('/session/<session_id>/round', methods=['POST'])
+def start_round(session_id):
+    """Endpoint to clear a session's smoothing state before a new round."""
+    smoothers.reset(session_id)
+    for player in range(1, MAX_PLAYERS + 1):
+        smoothers.reset(player_session_id(session_id, player))
+    return jsonify({'success': True})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Endpoint exposing Prometheus metrics."""
+    if not service_metrics.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(service_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint to check service health."""
     return jsonify({
         'status': 'healthy',
+        'active_sessions': len(tracker_pool),
+        'player_sessions': len(player_tracker_pool),
+        'inference_workers': len(worker_pool) if worker_pool is not None else 0,
+        'frame_gate': frame_gate.stats,
+        'gesture_cache': gesture_cache.stats() if gesture_cache is not None else None,
+        'quality_hints': quality_hints(),
+        'ml_batcher': (_detector.batcher.stats
+                       if _detector is not None and _detector.batcher is not None else None),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Endpoint to report whether the service can take traffic yet."""
+    started = service_ready.is_set()
+    # A crashed inference worker takes its share of sessions down with it
+    workers_ok = worker_pool is None or worker_pool.healthy
+    ready = started and workers_ok
+    return jsonify({
+        'status': 'ready' if ready else 'starting' if not started else 'degraded',
+        'components': {
+            'mediapipe': 'mediapipe' in sys.modules,
+            'ml_detector': _detector is not None,
+            'inference_workers': worker_pool.live_workers if worker_pool is not None else 0
+        },
         'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
+
+# Admin routes stay disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def require_admin(view):
+    """Reject admin requests without a matching ``Authorization: Bearer`` token."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Admin endpoints are disabled', 'success': False}), 404
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {ADMIN_TOKEN}'.encode()):
+            return jsonify({'error': 'Unauthorized', 'success': False}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/model', methods=['GET'])
+@require_admin
+def model_status():
+    """Endpoint to report the served classifier version and stored checkpoints."""
+    detector = get_detector()
+    store = detector.model_store
+    return jsonify({
+        'version': detector.model_version,
+        'available_versions': store.versions() if store is not None else [],
+        'latest_version': store.latest_version() if store is not None else None
     })
 
+@app.route('/admin/model/reload', methods=['POST'])
+@require_admin
+def reload_model():
+    """Endpoint to hot-swap a stored checkpoint (latest unless a version is given)."""
+    try:
+        version = (request.get_json(silent=True) or {}).get('version')
+        loaded = get_detector().reload_classifier(version)
+        if loaded is None:
+            return jsonify({'error': 'No checkpoint available', 'success': False}), 404
+        return jsonify({'version': loaded, 'success': True})
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/admin/model/checkpoint', methods=['POST'])
+@require_admin
+def checkpoint_model():
+    """Endpoint to save the classifier currently being served as a new version."""
+    detector = get_detector()
+    if detector.model_store is None:
+        return jsonify({'error': 'No model store configured', 'success': False}), 400
+    version = detector.model_store.save(detector.classifier)
+    detector.swap_classifier(version, detector.classifier)
+    return jsonify({'version': version, 'success': True})
+
 @app.route('/train', methods=['POST'])
 def train():
     try:
-        data = request.json
-        image_data = data['image']
-        gesture_label = data['gesture']
-        
-        # Convert base64 to image
-        encoded_data = image_data.split(',')[1]
-        nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if request.mimetype == LANDMARKS_MIMETYPE:
+            # Packed landmarks carry the label in a header or query string
+            gesture_label = request.headers.get('X-Gesture') or request.args.get('gesture')
+            try:
+                points = parse_landmarks(request.get_data())
+            except ValueError as e:
+                return jsonify({'error': str(e), 'success': False}), 400
+            queued = get_detector().train_on_landmarks(points, gesture_label)
+        else:
+            data = request.json
+            gesture_label = data['gesture']
+            
+            if 'landmarks' in data:
+                try:
+                    points = parse_landmarks(data['landmarks'])
+                except ValueError as e:
+                    return jsonify({'error': str(e), 'success': False}), 400
+                queued = get_detector().train_on_landmarks(points, gesture_label)
+            else:
+                # Convert base64 to image
+                image_data = data['image']
+                encoded_data = image_data[image_data.index(',') + 1:]
+                frame, _, _ = decode_frame(base64.b64decode(encoded_data), reduction=DECODE_REDUCTION)
+                queued = get_detector().train_on_sample(frame, gesture_label)
         
-        # Train the model on this sample
-        detector.train_on_sample(frame, gesture_label)
+        # Training runs in the background
+        if not queued:
+            return jsonify({
+                'error': 'No hand detected or unknown gesture label',
+                'success': False
+            }), 400
         
         return jsonify({
-            'message': f'Successfully trained on {gesture_label} gesture',
+            'message': f'Queued {gesture_label} gesture for training',
+            'buffered_samples': len(get_detector().replay_buffer),
             'success': True
         })
     except Exception as e:
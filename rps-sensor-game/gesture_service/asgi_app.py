@@ -0,0 +1,200 @@
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import service_metrics
+from app import app as flask_app
+from app import init_gesture_service
+
+# Threads running decode and inference; requests beyond
+# ASGI_WORKERS + ASGI_QUEUE_SIZE get an immediate 503
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 4))
+ASGI_QUEUE_SIZE = int(os.environ.get('ASGI_QUEUE_SIZE', 16))
+MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', 8 * 1024 * 1024))
+
+# Cheap endpoints answered on the event loop so they work under overload
+INLINE_PATHS = ('/health', '/ready', '/metrics')
+
+
+class GestureASGI:
+    """Asyncio front end for the Flask gesture service.
+
+    Request bodies are received on the event loop, so slow uploads and idle
+    connections cost no thread. Once a body is complete the Flask view runs
+    on a bounded thread pool. When ``max_pending`` requests are already
+    waiting for or using a thread, new ones are answered with 503 right away
+    rather than queued.
+    """
+
+    def __init__(self, wsgi_app, workers=4, max_pending=20, max_body_bytes=8 * 1024 * 1024,
+                 inline_paths=INLINE_PATHS, on_startup=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-worker')
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self.inline_paths = inline_paths
+        self.on_startup = on_startup
+        # Only touched from the event loop, so no lock is needed
+        self.pending = 0
+        self.stats = {'served': 0, 'shed': 0, 'too_large': 0, 'disconnected': 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            # WebSocket streaming stays on the Flask server
+            await send({'type': 'websocket.close', 'code': 1003})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.on_startup is not None and not self.on_startup():
+                    await send({'type': 'lifespan.startup.failed',
+                                'message': 'Failed to initialize gesture service'})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        inline = scope['path'] in self.inline_paths
+        if not inline and self.pending >= self.max_pending:
+            # Shed before reading the body so an overloaded box stays cheap
+            self.stats['shed'] += 1
+            await self._send_error(send, 503, 'Server overloaded', [(b'retry-after', b'1')])
+            return
+
+        body = await self._read_body(scope, receive)
+        if body is None:
+            self.stats['disconnected'] += 1
+            return
+        if body is False:
+            self.stats['too_large'] += 1
+            await self._send_error(send, 413, 'Request body too large')
+            return
+
+        environ = self._environ(scope, body)
+        if inline:
+            status, headers, content = self._call_wsgi(environ)
+        else:
+            if self.pending >= self.max_pending:
+                self.stats['shed'] += 1
+                await self._send_error(send, 503, 'Server overloaded', [(b'retry-after', b'1')])
+                return
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                status, headers, content = await loop.run_in_executor(
+                    self.executor, self._call_wsgi, environ)
+            finally:
+                self.pending -= 1
+
+        self.stats['served'] += 1
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _read_body(self, scope, receive):
+        """Collect the request body; None if the client left, False if too large."""
+        length = None
+        for name, value in scope['headers']:
+            if name == b'content-length':
+                length = int(value)
+        if length is not None and length > self.max_body_bytes:
+            return False
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body += message.get('body', b'')
+            if len(body) > self.max_body_bytes:
+                return False
+            if not message.get('more_body', False):
+                return bytes(body)
+
+    @staticmethod
+    def _environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('latin1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1'))
+                                   for name, value in headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+        return response['status'], response['headers'], content
+
+    @staticmethod
+    async def _send_error(send, status, message, headers=()):
+        content = json.dumps({'error': message}).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(content)).encode()), *headers]})
+        await send({'type': 'http.response.body', 'body': content})
+
+
+app = GestureASGI(
+    flask_app,
+    workers=ASGI_WORKERS,
+    max_pending=ASGI_WORKERS + ASGI_QUEUE_SIZE,
+    max_body_bytes=MAX_REQUEST_BYTES,
+    on_startup=init_gesture_service
+)
+
+if service_metrics.METRICS_ENABLED:
+    service_metrics.register_collector(lambda: {
+        'gesture_asgi_pending_requests': ('gauge', 'Requests waiting for or using an executor thread', app.pending),
+        'gesture_asgi_shed_requests': ('counter', 'Requests rejected with 503 under overload', app.stats['shed']),
+        'gesture_asgi_too_large_requests': ('counter', 'Requests rejected for exceeding MAX_REQUEST_BYTES',
+                                            app.stats['too_large'])
+    })
+
+if __name__ == '__main__':
+    # Imported here so the Flask server runs without an ASGI server installed
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,9 @@
+"""Offline replay benchmark for the gesture service.
+
+Run from the ``gesture_service`` directory::
+
+    python -m benchmark path/to/dataset --target rules --clients 4
+"""
+
+from benchmark.dataset import Sample, load_samples
+from benchmark.runner import LABELS, TARGETS, confusion_matrix, run_benchmark
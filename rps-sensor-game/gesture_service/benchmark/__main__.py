@@ -0,0 +1,51 @@
+import argparse
+import json
+import os
+import sys
+
+from benchmark.dataset import LOG_EXTENSION, load_samples
+from benchmark.runner import TARGETS, run_benchmark
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a labelled dataset through the gesture classifiers.')
+    parser.add_argument('dataset', help='Directory laid out as <label>/<frame or landmark dump>, or a .lmk landmark log')
+    parser.add_argument('--target', choices=TARGETS, default='rules',
+                        help='rules: process_frame/determine_gesture, ml: EnhancedGestureDetector')
+    parser.add_argument('--kind', choices=('image', 'landmarks', 'all'), default='all',
+                        help='Which sample types to replay')
+    parser.add_argument('--clients', type=int, default=1, help='Concurrent replay clients')
+    parser.add_argument('--repeat', type=int, default=1, help='Times to replay the dataset')
+    parser.add_argument('--frame-gate', action='store_true',
+                        help='Keep static-frame skipping enabled during the run')
+    parser.add_argument('--classifier',
+                        default=os.environ.get('GESTURE_CLASSIFIER_PATH') or os.environ.get('MODEL_DIR'),
+                        help='Frozen .npz classifier or model store directory for the ml target '
+                             '(default: $GESTURE_CLASSIFIER_PATH, then $MODEL_DIR)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+    if args.target == 'ml' and not args.classifier:
+        parser.error('--target ml needs --classifier, GESTURE_CLASSIFIER_PATH or MODEL_DIR')
+
+    kinds = ('image', 'landmarks') if args.kind == 'all' else (args.kind,)
+    samples = load_samples(args.dataset, kinds)
+    if not samples:
+        if args.dataset.endswith(LOG_EXTENSION) and 'landmarks' in kinds:
+            parser.error(f'{args.dataset} has no labelled records; only /train records carry a '
+                         'label, so a log written by /detect alone cannot be benchmarked')
+        parser.error(f'No samples of kind {args.kind} found in {args.dataset}')
+    report = run_benchmark(samples, args.target, args.clients, args.repeat, args.frame_gate,
+                           args.classifier)
+    report['dataset'] = args.dataset
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
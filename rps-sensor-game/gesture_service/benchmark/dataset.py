@@ -0,0 +1,63 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from landmark_log import GESTURE_NAMES, read_landmark_log
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+LANDMARK_EXTENSIONS = ('.npy', '.json')
+LOG_EXTENSION = '.lmk'
+
+# ``payload`` is encoded image bytes for images or a (21, 3) array for landmarks
+Sample = namedtuple('Sample', ['label', 'kind', 'path', 'payload'])
+
+
+def _load_landmarks(path):
+    if path.endswith('.npy'):
+        points = np.load(path)
+    else:
+        with open(path) as f:
+            points = np.asarray(json.load(f), dtype=np.float64)
+    points = points.reshape(-1, 21, 3)
+    return list(points)
+
+
+def load_log_samples(path):
+    """One landmark sample per labelled record of a ``LandmarkLog`` file."""
+    records = read_landmark_log(path)
+    records = records[records['label'] >= 0]
+    return [Sample(GESTURE_NAMES[int(label)], 'landmarks', path, points.astype(np.float64))
+            for label, points in zip(records['label'], records['landmarks'])]
+
+
+def load_samples(root, kinds=('image', 'landmarks')):
+    """Load a labelled dataset laid out as ``<root>/<label>/<file>``.
+
+    Images (.jpg/.png) are read into memory as encoded bytes so file I/O is
+    not part of the measurement. Landmark dumps (.npy or .json holding one
+    (21, 3) array or an (N, 21, 3) stack) expand to one sample per hand.
+    The ``none`` label marks frames where no gesture is expected.
+
+    ``root`` may instead be a ``.lmk`` landmark log, whose labelled records
+    become landmark samples.
+    """
+    if os.path.isfile(root) and root.endswith(LOG_EXTENSION):
+        return load_log_samples(root) if 'landmarks' in kinds else []
+
+    samples = []
+    for label in sorted(os.listdir(root)):
+        label_dir = os.path.join(root, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            path = os.path.join(label_dir, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension in IMAGE_EXTENSIONS and 'image' in kinds:
+                with open(path, 'rb') as f:
+                    samples.append(Sample(label, 'image', path, f.read()))
+            elif extension in LANDMARK_EXTENSIONS and 'landmarks' in kinds:
+                for points in _load_landmarks(path):
+                    samples.append(Sample(label, 'landmarks', path, points))
+    return samples
@@ -0,0 +1,169 @@
+import platform
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+LABELS = ('rock', 'paper', 'scissors', 'none')
+TARGETS = ('rules', 'ml')
+
+
+def _rules_classifier():
+    import app
+    from frame_ingest import decode_frame
+
+    def classify(sample, session_id):
+        timings = {}
+        if sample.kind == 'image':
+            frame, color, decode_timings = decode_frame(sample.payload, reduction=app.DECODE_REDUCTION)
+            timings.update(decode_timings)
+            gesture, _ = app.process_frame(frame, session_id, color, timings)
+        else:
+            start = time.perf_counter()
+            features = app.compute_features(sample.payload)
+            computed = time.perf_counter()
+            gesture = app.classify_features(features)[0][0]
+            timings['features_ms'] = (computed - start) * 1000
+            timings['classify_ms'] = (time.perf_counter() - computed) * 1000
+        return gesture, timings
+
+    def close(session_ids):
+        for session_id in session_ids:
+            app.tracker_pool.release(session_id)
+
+    return classify, close
+
+
+def _ml_classifier(classifier_path):
+    from enhanced_gesture_detector import EnhancedGestureDetector
+    from frame_gate import FrameGate
+    from frame_ingest import decode_frame
+    from landmark_features import landmarks_to_array
+    from model_store import load_pinned
+    # No result cache, so repeated samples are measured rather than looked up
+    detector = EnhancedGestureDetector(cache_size=0)
+    detector.swap_classifier(*load_pinned(classifier_path))
+
+    def classify(sample, session_id):
+        timings = {}
+        points = sample.payload
+        if sample.kind == 'image':
+            frame, color, decode_timings = decode_frame(sample.payload)
+            timings.update(decode_timings)
+            # The same stages as detect_gesture, timed the way the rules
+            # path times them (convert_ms and detect_ms)
+            with detector._hands_lock:
+                results = FrameGate._run(detector.hands, frame, color, timings)
+            if not results.multi_hand_landmarks:
+                return None, timings
+            points = landmarks_to_array(results.multi_hand_landmarks[0])
+        start = time.perf_counter()
+        features = detector.extract_feature_batch(points[np.newaxis])
+        computed = time.perf_counter()
+        gesture = detector.classifier.classify(features)[0][0]
+        timings['features_ms'] = (computed - start) * 1000
+        timings['classify_ms'] = (time.perf_counter() - computed) * 1000
+        return gesture, timings
+
+    return classify, lambda session_ids: None
+
+
+def _summarize(values):
+    values = np.asarray(values)
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p90': float(np.percentile(values, 90)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max())
+    }
+
+
+def confusion_matrix(labels, predictions):
+    """Rows are expected labels, columns are predictions, both in ``LABELS`` order."""
+    index = {label: i for i, label in enumerate(LABELS)}
+    matrix = np.zeros((len(LABELS), len(LABELS)), dtype=int)
+    for label, prediction in zip(labels, predictions):
+        matrix[index.get(label, index['none']), index.get(prediction, index['none'])] += 1
+    return matrix
+
+
+def run_benchmark(samples, target='rules', clients=1, repeat=1, frame_gate=False,
+                  classifier=None):
+    """Replay ``samples`` through a classifier and return a report dict.
+
+    Samples are spread round-robin over ``clients`` concurrent threads, each
+    with its own tracker session. With ``frame_gate`` off the static-frame
+    skip is disabled so every frame is measured end to end. Result caches
+    are always off. The ``ml`` target serves the frozen ``classifier``, an
+    ``.npz`` path or the latest version in a model store directory, which
+    it requires.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown benchmark target: {target}")
+    if not samples:
+        raise ValueError("No samples to benchmark")
+
+    if target == 'rules':
+        import app
+        if not frame_gate:
+            app.frame_gate.diff_threshold = 0
+        app.gesture_cache = None
+        # Ignore a GESTURE_CLASSIFIER=ml environment; this target is the rules
+        app.GESTURE_CLASSIFIER = 'rules'
+        classify, close = _rules_classifier()
+    else:
+        if not classifier:
+            raise ValueError("The ml target needs a frozen classifier to be reproducible")
+        classify, close = _ml_classifier(classifier)
+
+    work = [samples[i % len(samples)] for i in range(len(samples) * repeat)]
+    session_ids = [f'benchmark-{client}' for client in range(clients)]
+
+    def run_client(client):
+        results = []
+        for sample in work[client::clients]:
+            start = time.perf_counter()
+            gesture, timings = classify(sample, session_ids[client])
+            latency_ms = (time.perf_counter() - start) * 1000
+            results.append((sample.label, gesture or 'none', latency_ms, timings))
+        return results
+
+    # Warm up lazily loaded models outside the measured window
+    classify(samples[0], session_ids[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = [r for client_results in executor.map(run_client, range(clients))
+                   for r in client_results]
+    wall_seconds = time.perf_counter() - start
+    close(session_ids)
+
+    labels = [r[0] for r in results]
+    predictions = [r[1] for r in results]
+    stages = defaultdict(list)
+    for _, _, _, timings in results:
+        for stage, value in timings.items():
+            if stage.endswith('_ms'):
+                stages[stage].append(value)
+    matrix = confusion_matrix(labels, predictions)
+
+    return {
+        'target': target,
+        'classifier': classifier if target == 'ml' else None,
+        'clients': clients,
+        'frame_gate': frame_gate,
+        'samples': len(results),
+        'wall_seconds': wall_seconds,
+        'throughput_fps': len(results) / wall_seconds if wall_seconds else 0.0,
+        'latency_ms': _summarize([r[2] for r in results]),
+        'stages_ms': {stage: _summarize(values) for stage, values in sorted(stages.items())},
+        'accuracy': float(np.trace(matrix) / matrix.sum()),
+        'confusion_matrix': {'labels': list(LABELS), 'matrix': matrix.tolist()},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine()
+        }
+    }
@@ -1,29 +1,92 @@
+import threading
+
 import cv2
 import mediapipe as mp
 import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import StandardScaler
-import math
+from landmark_cache import LandmarkCache, feature_signature
+from landmark_log import SOURCE_TRAIN, read_landmark_log
+from landmark_features import HAND_JOINTS, NUM_LANDMARKS, joint_angles_2d, landmarks_to_array
+from micro_batcher import MicroBatcher
+from model_store import ModelWatcher
+from numpy_classifier import NumpyClassifier
+from player_slots import PlayerSlots
+from online_trainer import OnlineTrainer, ReplayBuffer
+
+# Flattened landmark coordinates followed by the planar joint angles
+FEATURE_SIZE = NUM_LANDMARKS * 3 + len(HAND_JOINTS)
+GESTURE_CLASSES = {'rock': 0, 'paper': 1, 'scissors': 2}
+
+# (units, activation) for each dense layer of the classifier
+DENSE_LAYERS = [(128, 'relu'), (64, 'relu'), (32, 'relu'), (3, 'softmax')]
 
 class EnhancedGestureDetector:
-    def __init__(self):
+    def __init__(self, classifier_path=None, model_store=None, reload_interval=5.0,
+                 cache_size=4096, cache_tolerance=0.05, max_num_hands=1, landmark_log=None,
+                 batch_size=0, batch_wait_ms=2.0, on_batch=None):
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
-            max_num_hands=1,
+            max_num_hands=max_num_hands,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.7
         )
+        self._hands_lock = threading.Lock()
+        self.player_slots = PlayerSlots(max_num_hands)
         self.mp_draw = mp.solutions.drawing_utils
         self.mp_draw_styles = mp.solutions.drawing_styles
         
-        # Initialize ML model
-        self.model = self._create_model()
-        self.scaler = StandardScaler()
+        # Detection runs on a frozen NumPy classifier that is swapped
+        # atomically; TensorFlow is only loaded once training starts
+        self.model_store = model_store
+        self.model_version, self._inference = None, None
+        if model_store is not None:
+            self.model_version, self._inference = model_store.load()
+        if self._inference is None:
+            self._inference = (NumpyClassifier.load(classifier_path) if classifier_path
+                               else self._initial_classifier())
+        # Keyed on the standardized feature row the classifier actually sees
+        self.cache = (LandmarkCache(cache_size, cache_tolerance, self._feature_signature)
+                      if cache_size > 0 else None)
+        # Concurrent classify_landmarks calls share one batched predict
+        self.batcher = None
+        if batch_size > 1:
+            self.batcher = MicroBatcher(self._predict_rows, batch_size, batch_wait_ms, on_batch)
+        self._train_model = None
+        self._train_scaler = None
+        # Reentrant so swap_inference can publish while holding it
+        self._train_lock = threading.RLock()
+        self.landmark_log = landmark_log
+
+        self.replay_buffer = ReplayBuffer()
+        self.trainer = OnlineTrainer(self, self.replay_buffer)
+
+        # Pick up checkpoints published by a trainer in another process
+        self._watcher = None
+        if model_store is not None:
+            self._watcher = ModelWatcher(model_store, self.swap_classifier,
+                                         reload_interval, self.model_version)
+            self._watcher.start()
+
+    @property
+    def classifier(self):
+        return self._inference
+
+    @staticmethod
+    def _initial_classifier():
+        """Untrained Glorot-uniform weights, matching a fresh Keras model."""
+        rng = np.random.default_rng()
+        layers = []
+        inputs = FEATURE_SIZE
+        for units, activation in DENSE_LAYERS:
+            limit = np.sqrt(6 / (inputs + units))
+            layers.append((rng.uniform(-limit, limit, (inputs, units)), np.zeros(units), activation))
+            inputs = units
+        return NumpyClassifier(layers)
         
     def _create_model(self):
+        import tensorflow as tf
         model = tf.keras.Sequential([
-            tf.keras.layers.Dense(128, activation='relu', input_shape=(63,)),
+            tf.keras.layers.Dense(128, activation='relu', input_shape=(FEATURE_SIZE,)),
             tf.keras.layers.Dropout(0.3),
             tf.keras.layers.Dense(64, activation='relu'),
             tf.keras.layers.Dropout(0.2),
@@ -35,46 +98,160 @@ class EnhancedGestureDetector:
                      metrics=['accuracy'])
         return model
 
-    def _calculate_finger_angles(self, landmarks):
-        angles = []
-        # Define finger joint connections
-        finger_joints = [
-            [0, 1, 2], [1, 2, 3], [2, 3, 4],  # Thumb
-            [0, 5, 6], [5, 6, 7], [6, 7, 8],  # Index
-            [0, 9, 10], [9, 10, 11], [10, 11, 12],  # Middle
-            [0, 13, 14], [13, 14, 15], [14, 15, 16],  # Ring
-            [0, 17, 18], [17, 18, 19], [18, 19, 20]  # Pinky
-        ]
-        
-        for joint in finger_joints:
-            p1 = np.array([landmarks[joint[0]].x, landmarks[joint[0]].y])
-            p2 = np.array([landmarks[joint[1]].x, landmarks[joint[1]].y])
-            p3 = np.array([landmarks[joint[2]].x, landmarks[joint[2]].y])
-            
-            # Calculate angle between joints
-            angle = math.degrees(math.atan2(p3[1] - p2[1], p3[0] - p2[0]) - 
-                               math.atan2(p1[1] - p2[1], p1[0] - p2[0]))
-            angle = abs(angle)
-            if angle > 180:
-                angle = 360 - angle
-            angles.append(angle)
-            
-        return angles
+    def training_state(self):
+        """Model and scaler owned by the background trainer, built on first use.
+
+        The model starts from the weights currently used for detection.
+        """
+        with self._train_lock:
+            if self._train_model is None:
+                from sklearn.preprocessing import StandardScaler
+                self._train_model = self._create_model()
+                weights = []
+                for kernel, bias, _ in self._inference.layers:
+                    weights.extend([kernel, bias])
+                self._train_model.set_weights(weights)
+                self._train_scaler = StandardScaler()
+                if self._inference.mean is not None:
+                    # Continue from the scaler statistics the weights were trained with
+                    self._train_scaler.mean_ = self._inference.mean.astype(np.float64)
+                    self._train_scaler.scale_ = self._inference.scale.astype(np.float64)
+                    self._train_scaler.var_ = self._train_scaler.scale_ ** 2
+                    self._train_scaler.n_features_in_ = FEATURE_SIZE
+                    self._train_scaler.n_samples_seen_ = self._inference.scaler_samples
+            return self._train_model, self._train_scaler
+
+    def swap_inference(self, model, scaler):
+        """Freeze the trained model and scaler and publish them for detection.
+
+        With a model store the result is also checkpointed for other processes.
+        """
+        with self._train_lock:
+            if model is not self._train_model:
+                # A reload replaced the served classifier during this round;
+                # publishing would undo it
+                return
+            classifier = NumpyClassifier.from_keras(model, scaler)
+            version = None
+            if self.model_store is not None:
+                version = self.model_store.save(classifier)
+                if self._watcher is not None:
+                    self._watcher.current_version = version
+            self.swap_classifier(version, classifier, reseed=False)
+
+    def swap_classifier(self, version, classifier, reseed=True):
+        """Atomically replace the classifier used for detection.
+
+        Unless the classifier came from the trainer itself (``reseed=False``),
+        the training model and scaler are dropped so the next round starts
+        from the new weights.
+        """
+        with self._train_lock:
+            self._inference = classifier
+            self.model_version = version
+            if reseed:
+                self._train_model = None
+                self._train_scaler = None
+        if self.cache is not None:
+            self.cache.clear()
+
+    def reload_classifier(self, version=None):
+        """Load a checkpoint (the latest by default) from the model store."""
+        if self.model_store is None:
+            raise ValueError("No model store configured")
+        version, classifier = self.model_store.load(version)
+        if classifier is None:
+            return None
+        self.swap_classifier(version, classifier)
+        return version
+
+    def export_classifier(self, path):
+        """Write the classifier currently used for detection to ``path``."""
+        self._inference.save(path)
 
     def _extract_features(self, landmarks):
-        # Extract coordinates and angles
-        coords = []
-        for lm in landmarks:
-            coords.extend([lm.x, lm.y, lm.z])
-        
-        angles = self._calculate_finger_angles(landmarks)
-        features = np.array(coords + angles).reshape(1, -1)
-        
-        return self.scaler.fit_transform(features)
+        # Extract coordinates and angles from one (21, 3) array
+        points = landmarks_to_array(landmarks)
+        angles = joint_angles_2d(points)[0]
+        return np.concatenate([points.reshape(-1), angles]).reshape(1, -1)
+
+    @staticmethod
+    def extract_feature_batch(points):
+        """Feature rows for an (N, 21, 3) landmark stack."""
+        points = np.asarray(points, dtype=np.float64)
+        return np.concatenate([points.reshape(len(points), -1), joint_angles_2d(points)], axis=1)
+
+    def classify_landmarks(self, landmarks):
+        """Classify one hand's landmarks, returning ``(gesture, confidence)``.
+
+        ``landmarks`` may be MediaPipe landmarks or a (21, 3) array.
+        """
+        features = self._extract_features(landmarks)[0]
+        classifier = self._inference
+
+        def compute(features):
+            if self.batcher is not None:
+                return self.batcher.run(features)
+            return classifier.classify(features)
+
+        if self.cache is None:
+            return compute(features)
+        return self.cache.get_or_compute(features, compute)
+
+    def _feature_signature(self, features, tolerance):
+        # Standardize with the served scaler so one tolerance fits both
+        # coordinates and angles
+        classifier = self._inference
+        if classifier.mean is not None:
+            features = (features - classifier.mean) / classifier.scale
+        return feature_signature(features, tolerance)
+
+    def _predict_rows(self, features):
+        gestures, confidences = self._inference.classify(features)
+        return list(zip(gestures, confidences))
+
+    def classify_landmark_batch(self, points):
+        """Classify an (N, 21, 3) stack, returning lists of gestures and confidences."""
+        return self._inference.classify(self.extract_feature_batch(points))
+
+    def detect_players(self, frame):
+        """Classify every hand in ``frame`` and return one result per player slot.
+
+        Needs ``max_num_hands`` > 1 to see more than one player. Each result
+        has ``player`` (1-based), ``hand_detected``, ``handedness``,
+        ``gesture`` and ``confidence``.
+        """
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with self._hands_lock:
+            results = self.hands.process(frame_rgb)
+
+            detected = []
+            for i, landmarks in enumerate(results.multi_hand_landmarks or []):
+                handedness = None
+                if results.multi_handedness and i < len(results.multi_handedness):
+                    handedness = results.multi_handedness[i].classification[0].label
+                detected.append((landmarks_to_array(landmarks), handedness))
+            assigned = self.player_slots.assign(detected)
+
+        if detected:
+            gestures, confidences = self.classify_landmark_batch(
+                np.stack([points for points, _ in detected]))
+
+        players = []
+        for slot, index in enumerate(assigned):
+            player = {'player': slot + 1, 'hand_detected': index is not None,
+                      'handedness': None, 'gesture': 'unknown', 'confidence': 0.0}
+            if index is not None:
+                player['handedness'] = detected[index][1]
+                player['gesture'] = gestures[index]
+                player['confidence'] = confidences[index]
+            players.append(player)
+        return players
 
     def detect_gesture(self, frame):
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+        with self._hands_lock:
+            results = self.hands.process(frame_rgb)
         
         gesture_info = {
             'gesture': 'unknown',
@@ -88,18 +265,9 @@ class EnhancedGestureDetector:
             landmarks = results.multi_hand_landmarks[0]
             gesture_info['landmarks'] = landmarks
             
-            # Extract features for ML model
-            features = self._extract_features(landmarks.landmark)
-            
-            # Get model predictions
-            predictions = self.model.predict(features, verbose=0)
-            predicted_class = np.argmax(predictions[0])
-            confidence = predictions[0][predicted_class]
-            
-            # Map class index to gesture
-            gestures = ['rock', 'paper', 'scissors']
-            gesture_info['gesture'] = gestures[predicted_class]
-            gesture_info['confidence'] = float(confidence)
+            gesture, confidence = self.classify_landmarks(landmarks)
+            gesture_info['gesture'] = gesture
+            gesture_info['confidence'] = confidence
             
             # Draw hand landmarks with custom style
             self.mp_draw.draw_landmarks(
@@ -132,18 +300,54 @@ class EnhancedGestureDetector:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1, cv2.LINE_AA)
 
     def train_on_sample(self, frame, gesture_label):
-        """Train the model on a single sample (for online learning)"""
+        """Queue a labelled sample for the background trainer.
+
+        Returns True when a hand was found and the sample was buffered.
+        """
+        label = GESTURE_CLASSES.get(gesture_label, -1)
+        if label == -1:
+            return False
+
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+        with self._hands_lock:
+            results = self.hands.process(frame_rgb)
         
-        if results.multi_hand_landmarks:
-            landmarks = results.multi_hand_landmarks[0]
-            features = self._extract_features(landmarks.landmark)
-            
-            # Convert gesture label to class index
-            gesture_classes = {'rock': 0, 'paper': 1, 'scissors': 2}
-            label = gesture_classes.get(gesture_label, -1)
-            
-            if label != -1:
-                # Update model with single sample
-                self.model.train_on_batch(features, np.array([label])) 
\ No newline at end of file
+        if not results.multi_hand_landmarks:
+            return False
+
+        return self.train_on_landmarks(results.multi_hand_landmarks[0], gesture_label)
+
+    def train_on_landmarks(self, landmarks, gesture_label):
+        """Queue a labelled sample from precomputed landmarks.
+
+        ``landmarks`` may be MediaPipe landmarks or a (21, 3) array.
+        """
+        label = GESTURE_CLASSES.get(gesture_label, -1)
+        if label == -1:
+            return False
+
+        points = landmarks_to_array(landmarks)
+        if self.landmark_log is not None:
+            self.landmark_log.append(points, label=gesture_label, source=SOURCE_TRAIN)
+        features = self._extract_features(points)
+        self.replay_buffer.add(features[0], label)
+        self.trainer.start()
+        self.trainer.notify()
+        return True
+
+    def train_on_log(self, path):
+        """Queue every labelled record of a landmark log for training.
+
+        Returns the number of samples added to the replay buffer.
+        """
+        records = read_landmark_log(path)
+        records = records[records['label'] >= 0]
+        if len(records) == 0:
+            return 0
+        features = self.extract_feature_batch(records['landmarks'].astype(np.float64))
+        for row, code in zip(features, records['label']):
+            # Log codes follow GESTURE_CLASSES
+            self.replay_buffer.add(row, int(code))
+        self.trainer.start()
+        self.trainer.notify()
+        return len(records)
@@ -0,0 +1,135 @@
+import time
+
+import cv2
+import numpy as np
+
+from landmark_features import landmarks_to_array
+
+
+class FrameGate:
+    """Skip hand detection for frames that barely changed.
+
+    Each frame is reduced to a small grayscale thumbnail and compared with
+    the thumbnail of the last frame that actually went through the
+    detector. A frame is static when no thumbnail cell covering the last
+    detected hands changed by ``diff_threshold`` or more (any cell when no
+    hand was found), so a finger moving on a small hand is not averaged
+    away by the still background. Static frames reuse the previous
+    landmarks; all others run the caller's tracker on the full frame,
+    which in tracking mode already limits itself to the previous hand.
+
+    Per-session state lives in a plain dict supplied by the caller.
+    """
+
+    def __init__(self, diff_threshold=2.0, max_skips=5, thumbnail_size=(32, 24)):
+        self.diff_threshold = diff_threshold
+        self.max_skips = max_skips
+        self.thumbnail_size = thumbnail_size
+        self.stats = {'skipped': 0, 'full': 0}
+
+    def _thumbnail(self, frame, color):
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        code = cv2.COLOR_RGB2GRAY if color == 'rgb' else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(small, code).astype(np.int16)
+
+    @staticmethod
+    def _run(hands, frame, color, timings):
+        start = time.perf_counter()
+        if color == 'rgb':
+            frame = np.ascontiguousarray(frame)
+        else:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        converted = time.perf_counter()
+        results = hands.process(frame)
+        finished = time.perf_counter()
+        timings['convert_ms'] = timings.get('convert_ms', 0.0) + (converted - start) * 1000
+        timings['detect_ms'] = timings.get('detect_ms', 0.0) + (finished - converted) * 1000
+        return results
+
+    @classmethod
+    def _process(cls, hands, frame, color, timings):
+        results = cls._run(hands, frame, color, timings)
+        if not results.multi_hand_landmarks:
+            return None
+        return landmarks_to_array(results.multi_hand_landmarks[0])
+
+    def _hand_cells(self, hand_points):
+        """Thumbnail slices covering the hands, padded by one cell, or the whole thumbnail."""
+        if not hand_points:
+            return slice(None), slice(None)
+        width, height = self.thumbnail_size
+        size = np.array([width, height])
+        xy = np.concatenate([points[:, :2] for points in hand_points])
+        # Landmarks can fall slightly outside the frame; keep at least one cell
+        low = np.clip(np.floor(xy.min(axis=0) * size).astype(int) - 1, 0, size - 1)
+        high = np.clip(np.ceil(xy.max(axis=0) * size).astype(int) + 1, low + 1, size)
+        return slice(low[1], high[1]), slice(low[0], high[0])
+
+    def _is_static(self, frame, state, key, hand_points, color, timings):
+        """Return ``(static, thumbnail)`` for ``frame`` against the last detected one."""
+        if self.diff_threshold <= 0:
+            return False, None
+        start = time.perf_counter()
+        thumbnail = self._thumbnail(frame, color)
+        previous = state.get('thumbnail')
+        static = (previous is not None and key in state and
+                  state.get('skips', 0) < self.max_skips)
+        if static:
+            rows, cols = self._hand_cells(hand_points)
+            static = np.abs(thumbnail[rows, cols] - previous[rows, cols]).max() < self.diff_threshold
+        timings['gate_ms'] = (time.perf_counter() - start) * 1000
+        if static:
+            state['skips'] = state.get('skips', 0) + 1
+            self.stats['skipped'] += 1
+        return static, thumbnail
+
+    def detect(self, hands, frame, state, color='bgr', timings=None):
+        """Return ``(points, reused)`` for ``frame``.
+
+        ``points`` are (21, 3) full-frame landmarks or None, and ``reused``
+        is True when they were carried over from the last detected frame.
+        ``color`` is the channel order of ``frame``; stage durations in
+        milliseconds are added to ``timings`` when given.
+        """
+        timings = {} if timings is None else timings
+        previous = state.get('points')
+        static, thumbnail = self._is_static(frame, state, 'points',
+                                            [] if previous is None else [previous],
+                                            color, timings)
+        if static:
+            return previous, True
+
+        points = self._process(hands, frame, color, timings)
+        self.stats['full'] += 1
+
+        state['thumbnail'] = thumbnail
+        state['skips'] = 0
+        state['points'] = points
+        return points, False
+
+    def detect_hands(self, hands, frame, state, color='bgr', timings=None):
+        """Return ``(hands, reused)`` with ``[(points, handedness), ...]`` for ``frame``.
+
+        Static frames are skipped as in ``detect``.
+        """
+        timings = {} if timings is None else timings
+        previous = state.get('hands') or []
+        static, thumbnail = self._is_static(frame, state, 'hands',
+                                            [points for points, _ in previous],
+                                            color, timings)
+        if static:
+            return state['hands'], True
+
+        results = self._run(hands, frame, color, timings)
+        self.stats['full'] += 1
+        detected = []
+        for i, landmarks in enumerate(results.multi_hand_landmarks or []):
+            handedness = None
+            if results.multi_handedness and i < len(results.multi_handedness):
+                handedness = results.multi_handedness[i].classification[0].label
+            detected.append((landmarks_to_array(landmarks), handedness))
+
+        state['thumbnail'] = thumbnail
+        state['skips'] = 0
+        state['hands'] = detected
+        return detected, False
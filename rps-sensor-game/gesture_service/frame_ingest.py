@@ -0,0 +1,83 @@
+import time
+
+import cv2
+import numpy as np
+
+# JPEG/PNG decoders can shrink by these factors while decoding
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+FRAME_FORMATS = ('jpeg', 'rgb', 'nv12')
+
+
+class IngestError(ValueError):
+    """Raised when a request payload cannot be turned into a frame."""
+
+
+def read_buffer(stream, length=None):
+    """Read a request or upload stream into a buffer with as few copies as possible.
+
+    With a known ``length``, as for ``application/octet-stream`` bodies,
+    the stream is read into a single preallocated buffer. Multipart
+    uploads arrive as spooled files of unknown length and are read whole.
+    """
+    if length and hasattr(stream, 'readinto'):
+        buffer = bytearray(length)
+        view = memoryview(buffer)
+        read = 0
+        while read < length:
+            count = stream.readinto(view[read:])
+            if not count:
+                break
+            read += count
+        return view[:read]
+    return stream.read()
+
+
+def decode_frame(buffer, frame_format='jpeg', width=None, height=None, reduction=1):
+    """Turn an encoded or raw payload into a frame.
+
+    Returns ``(frame, color, timings)`` where ``color`` is ``'bgr'`` or
+    ``'rgb'`` and ``timings`` maps stage names to milliseconds. Raw ``rgb``
+    payloads are wrapped without copying; ``nv12`` payloads convert straight
+    to RGB.
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    if frame_format == 'jpeg':
+        flag = DECODE_FLAGS.get(reduction)
+        if flag is None:
+            raise IngestError(f"Unsupported decode reduction: {reduction}")
+        frame = None
+        if len(buffer):
+            frame = cv2.imdecode(np.frombuffer(buffer, np.uint8), flag)
+        timings['decode_ms'] = (time.perf_counter() - start) * 1000
+        if frame is None:
+            raise IngestError("Invalid image data")
+        return frame, 'bgr', timings
+
+    if frame_format not in FRAME_FORMATS:
+        raise IngestError(f"Unsupported frame format: {frame_format}")
+    if not width or not height:
+        raise IngestError("Raw frames require width and height")
+    if width <= 0 or height <= 0:
+        raise IngestError("Frame width and height must be positive")
+    if frame_format == 'nv12' and (width % 2 or height % 2):
+        raise IngestError("NV12 frames require even width and height")
+
+    data = np.frombuffer(buffer, np.uint8)
+    if frame_format == 'rgb':
+        if data.size != width * height * 3:
+            raise IngestError("RGB payload size does not match width and height")
+        frame = data.reshape(height, width, 3)
+    else:
+        if data.size != width * height * 3 // 2:
+            raise IngestError("NV12 payload size does not match width and height")
+        frame = cv2.cvtColor(data.reshape(height * 3 // 2, width), cv2.COLOR_YUV2RGB_NV12)
+    timings['decode_ms'] = (time.perf_counter() - start) * 1000
+    return frame, 'rgb', timings
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+GESTURES = ('rock', 'paper', 'scissors')
+
+
+class GestureSmoother:
+    """Temporal filter and early-commit state machine for one session.
+
+    Per-gesture scores are an exponential moving average of the per-frame
+    confidences. The leading gesture only replaces the current one when it
+    beats it by ``hysteresis``, and it is committed once it has stayed in
+    the lead for ``commit_frames`` frames or ``commit_ms`` milliseconds.
+    """
+
+    def __init__(self, alpha=0.5, hysteresis=0.15, min_score=0.5,
+                 commit_frames=3, commit_ms=300):
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.min_score = min_score
+        self.commit_frames = commit_frames
+        self.commit_ms = commit_ms
+        self.reset()
+
+    def reset(self):
+        """Start a new round."""
+        self.scores = dict.fromkeys(GESTURES, 0.0)
+        self.current = None
+        self.stable_frames = 0
+        self.stable_since = None
+        self.committed = None
+
+    def update(self, gesture, confidence, now=None, fresh=True):
+        """Feed one frame's classification and return the smoothed state.
+
+        ``gesture`` may be None when no hand or gesture was recognized.
+        A result that is not ``fresh`` (reused from an earlier frame rather
+        than detected again) leaves the state untouched, so it can neither
+        move the scores nor count toward a commit.
+        """
+        if not fresh:
+            return self._state(False)
+        now = time.monotonic() if now is None else now
+        for name in GESTURES:
+            observed = confidence if name == gesture else 0.0
+            self.scores[name] += self.alpha * (observed - self.scores[name])
+
+        leader = max(GESTURES, key=self.scores.get)
+        if self.scores[leader] < self.min_score:
+            leader = None
+
+        if leader != self.current:
+            current_score = self.scores[self.current] if self.current else 0.0
+            if leader is None or self.scores[leader] - current_score >= self.hysteresis:
+                self.current = leader
+                self.stable_frames = 0
+                self.stable_since = now
+
+        just_committed = False
+        if self.current is not None:
+            self.stable_frames += 1
+            stable_ms = (now - self.stable_since) * 1000
+            if (self.committed is None and
+                    (self.stable_frames >= self.commit_frames or stable_ms >= self.commit_ms)):
+                self.committed = self.current
+                just_committed = True
+        return self._state(just_committed)
+
+    def _state(self, just_committed):
+        return {
+            'gesture': self.current,
+            'confidence': self.scores[self.current] if self.current else 0.0,
+            'stable_frames': self.stable_frames,
+            'committed': self.committed,
+            'just_committed': just_committed
+        }
+
+
+class SmootherRegistry:
+    """Bounded, session-keyed collection of ``GestureSmoother`` instances."""
+
+    def __init__(self, max_size=256, **smoother_options):
+        self.max_size = max_size
+        self.smoother_options = smoother_options
+        self._smoothers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            smoother = self._smoothers.get(session_id)
+            if smoother is None:
+                while len(self._smoothers) >= self.max_size:
+                    self._smoothers.popitem(last=False)
+                smoother = GestureSmoother(**self.smoother_options)
+                self._smoothers[session_id] = smoother
+            else:
+                self._smoothers.move_to_end(session_id)
+            return smoother
+
+    def update(self, session_id, gesture, confidence, fresh=True):
+        smoother = self.get(session_id)
+        with self._lock:
+            return smoother.update(gesture, confidence, fresh=fresh)
+
+    def reset(self, session_id):
+        with self._lock:
+            smoother = self._smoothers.get(session_id)
+            if smoother is not None:
+                smoother.reset()
+
+    def release(self, session_id):
+        with self._lock:
+            self._smoothers.pop(session_id, None)
@@ -0,0 +1,147 @@
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameQueue:
+    """Bounded frame queue where new frames push out superseded ones.
+
+    Frames are kept as raw encoded bytes, so anything dropped here is never
+    decoded.
+    """
+
+    def __init__(self, maxsize=1):
+        self._frames = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        """Enqueue a frame, returning how many stale frames it displaced."""
+        with self._cond:
+            dropped = 0
+            while len(self._frames) >= self._maxsize:
+                self._frames.popleft()
+                dropped += 1
+            self._frames.append(frame)
+            self.dropped += dropped
+            self._cond.notify()
+            return dropped
+
+    def get(self):
+        """Block until a frame is available; returns None once closed."""
+        with self._cond:
+            while not self._frames and not self._closed:
+                self._cond.wait()
+            if not self._frames:
+                return None
+            return self._frames.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._frames)
+
+
+class StreamMetrics:
+    """Service-wide counters for streaming connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active_connections = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.events_sent = 0
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'active_connections': self.active_connections,
+                'frames_received': self.frames_received,
+                'frames_dropped': self.frames_dropped,
+                'frames_processed': self.frames_processed,
+                'events_sent': self.events_sent
+            }
+
+
+class GestureStream:
+    """Serve one streaming connection.
+
+    The receive loop only enqueues encoded frames; a worker thread classifies
+    the newest one with ``classify(frame_bytes) -> (gesture, confidence)`` and
+    sends an event whenever the recognized gesture changes.
+    """
+
+    def __init__(self, ws, classify, metrics, queue_size=1):
+        self.ws = ws
+        self.classify = classify
+        self.metrics = metrics
+        self.frames = LatestFrameQueue(queue_size)
+        self.last_gesture = None
+
+    def run(self):
+        self.metrics.increment('active_connections')
+        worker = threading.Thread(target=self._process_frames, daemon=True)
+        worker.start()
+        try:
+            while True:
+                message = self.ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, str):
+                    # Only binary frames are accepted on this channel
+                    continue
+                self.metrics.increment('frames_received')
+                dropped = self.frames.put(message)
+                if dropped:
+                    self.metrics.increment('frames_dropped', dropped)
+        finally:
+            self.frames.close()
+            worker.join()
+            self.metrics.increment('active_connections', -1)
+
+    def _process_frames(self):
+        while True:
+            frame_bytes = self.frames.get()
+            if frame_bytes is None:
+                return
+            try:
+                gesture, confidence = self.classify(frame_bytes)
+            except Exception as e:
+                logger.error(f"Error processing stream frame: {str(e)}")
+                continue
+            self.metrics.increment('frames_processed')
+
+            if not isinstance(confidence, float):
+                # Error messages and "No hand detected" clear the gesture
+                gesture, confidence = None, 0.0
+            if gesture == self.last_gesture:
+                continue
+            self.last_gesture = gesture
+
+            try:
+                self.ws.send(json.dumps({
+                    'type': 'gesture',
+                    'gesture': gesture,
+                    'confidence': confidence,
+                    'dropped_frames': self.frames.dropped,
+                    'timestamp': datetime.now().isoformat()
+                }))
+            except Exception as e:
+                logger.error(f"Error sending stream event: {str(e)}")
+                return
+            self.metrics.increment('events_sent')
@@ -0,0 +1,289 @@
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A crashed worker is restarted after RESTART_BACKOFF seconds, doubling per
+# consecutive crash up to MAX_RESTART_BACKOFF. A worker that crashes more than
+# MAX_RESTARTS times without answering a request in between stays down.
+RESTART_BACKOFF = 0.5
+MAX_RESTART_BACKOFF = 30.0
+MAX_RESTARTS = 5
+
+
+class FrameTooLarge(ValueError):
+    """The frame does not fit in a worker's shared-memory slot."""
+
+
+def _worker_main(shm_name, slot_bytes, requests, results, frame_handler, release_handler):
+    """Inference loop run inside each worker process."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            kind = message[0]
+            if kind == 'release':
+                release_handler(message[1])
+                continue
+
+            _, request_id, slot, shape, color, session_id = message
+            frame = np.ndarray(shape, np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            timings = {}
+            try:
+                gesture, confidence = frame_handler(frame, session_id, color, timings)
+                results.send((request_id, gesture, confidence, timings, None))
+            except Exception as e:
+                results.send((request_id, None, None, timings, str(e)))
+            finally:
+                del frame
+    finally:
+        shm.close()
+        results.close()
+
+
+class _Worker:
+    def __init__(self, context, slots, slot_bytes, frame_handler, release_handler):
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free_slots = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self._context = context
+        self._args = (slot_bytes, frame_handler, release_handler)
+        # Crashes since the worker last answered a request
+        self.failures = 0
+        self.restart_timer = None
+        self.start()
+
+    def start(self):
+        """Start the worker process on a fresh request queue and result pipe.
+
+        Each worker writes to its own pipe, so one that dies mid-write
+        cannot wedge the others, and its exit shows up as EOF on ``results``.
+        """
+        slot_bytes, frame_handler, release_handler = self._args
+        self.requests = self._context.Queue()
+        self.results, writer = self._context.Pipe(duplex=False)
+        self.process = self._context.Process(
+            target=_worker_main,
+            args=(self.shm.name, slot_bytes, self.requests, writer,
+                  frame_handler, release_handler),
+            daemon=True
+        )
+        self.process.start()
+        writer.close()
+        self.up = True
+
+
+class InferenceWorkerPool:
+    """Pool of inference processes fed through shared memory.
+
+    Each worker owns its own trackers and detectors. Decoded frames are
+    copied into one of the worker's shared-memory slots and only a small
+    descriptor is sent over the queue. Sessions are routed to a fixed worker
+    so MediaPipe tracking continuity is kept. A worker that dies has its
+    in-flight requests failed and is restarted with fresh trackers after a
+    growing backoff; requests routed to it fail fast until then, and the
+    pool is not ``healthy``.
+
+    ``frame_handler(frame, session_id, color, timings)`` and
+    ``release_handler(session_id)`` must be importable module-level
+    functions; they run inside the workers.
+    """
+
+    def __init__(self, frame_handler, release_handler, num_workers=2,
+                 slots_per_worker=4, max_frame_bytes=1920 * 1080 * 3, timeout=10.0):
+        self.slot_bytes = max_frame_bytes
+        self.timeout = timeout
+        context = mp.get_context('spawn')
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._closed = False
+        # Wakes the result collector when a restarted worker has a new pipe
+        self._wakeup_reader, self._wakeup = context.Pipe(duplex=False)
+        self._workers = [
+            _Worker(context, slots_per_worker, max_frame_bytes, frame_handler, release_handler)
+            for _ in range(num_workers)
+        ]
+        self._collector = threading.Thread(target=self._collect_results, name='worker-results', daemon=True)
+        self._collector.start()
+
+    def __len__(self):
+        return len(self._workers)
+
+    @property
+    def live_workers(self):
+        return sum(worker.up for worker in self._workers)
+
+    @property
+    def healthy(self):
+        """True while every worker is running."""
+        return not self._closed and self.live_workers == len(self._workers)
+
+    def _worker_for(self, session_id):
+        return self._workers[zlib.crc32(session_id.encode()) % len(self._workers)]
+
+    def submit(self, frame, session_id, color='bgr'):
+        """Queue a frame on the session's worker and return a Future of
+        ``(gesture, confidence, timings)``.
+
+        Raises FrameTooLarge when the frame does not fit in a slot.
+        """
+        return self._submit(self._worker_for(session_id), frame, session_id, color)
+
+    def _submit(self, worker, frame, session_id, color):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes:
+            raise FrameTooLarge(f"Frame of {frame.nbytes} bytes exceeds the "
+                                f"{self.slot_bytes}-byte worker slot")
+        if not worker.up:
+            raise RuntimeError("Inference worker is down")
+
+        slot = worker.free_slots.get(timeout=self.timeout)
+        slot_view = np.ndarray(frame.shape, np.uint8, buffer=worker.shm.buf,
+                               offset=slot * self.slot_bytes)
+        slot_view[...] = frame
+        del slot_view
+
+        future = Future()
+        request_id = next(self._request_ids)
+        # Registered and queued together, so a restart either fails this
+        # request or sees it go to the new process
+        with self._pending_lock:
+            if self._closed or not worker.up:
+                worker.free_slots.put(slot)
+                raise RuntimeError("Inference worker pool is shut down" if self._closed
+                                   else "Inference worker is down")
+            self._pending[request_id] = (future, worker, slot)
+            worker.requests.put(('frame', request_id, slot, frame.shape, color, session_id))
+        return future
+
+    def process(self, frame, session_id, color='bgr', timings=None):
+        """Blocking helper with the same contract as ``process_frame``."""
+        gesture, confidence, worker_timings = self.submit(frame, session_id, color).result(self.timeout)
+        if timings is not None:
+            timings.update(worker_timings)
+        return gesture, confidence
+
+    def release(self, session_id):
+        with self._pending_lock:
+            worker = self._worker_for(session_id)
+            # A down worker has no trackers left to release
+            if worker.up and not self._closed:
+                worker.requests.put(('release', session_id))
+
+    def warm_up(self, frame, session_id):
+        """Run ``frame`` through every worker, then drop the warmup session."""
+        futures = [self._submit(worker, frame, session_id, 'bgr') for worker in self._workers]
+        for future in futures:
+            future.result(self.timeout)
+        with self._pending_lock:
+            for worker in self._workers:
+                if worker.up:
+                    worker.requests.put(('release', session_id))
+
+    def _collect_results(self):
+        while True:
+            readers = {worker.results: worker for worker in self._workers
+                       if worker.results is not None}
+            if self._closed and not readers:
+                return
+            for reader in connection.wait([self._wakeup_reader, *readers]):
+                if reader is self._wakeup_reader:
+                    reader.recv()
+                    continue
+                worker = readers[reader]
+                try:
+                    message = reader.recv()
+                except EOFError:
+                    self._worker_exited(worker)
+                    continue
+                worker.failures = 0
+                request_id, gesture, confidence, timings, error = message
+                with self._pending_lock:
+                    entry = self._pending.pop(request_id, None)
+                if entry is None:
+                    continue
+                future, _, slot = entry
+                worker.free_slots.put(slot)
+                if error is not None:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result((gesture, confidence, timings))
+
+    def _worker_exited(self, worker):
+        """Fail a dead worker's in-flight requests and schedule its restart."""
+        with self._pending_lock:
+            worker.results.close()
+            worker.results = None
+            worker.up = False
+            lost = [request_id for request_id, entry in self._pending.items() if entry[1] is worker]
+            lost = [self._pending.pop(request_id) for request_id in lost]
+            worker.process.join()
+            worker.requests.close()
+            worker.requests.cancel_join_thread()
+            if not self._closed:
+                worker.failures += 1
+                if worker.failures > MAX_RESTARTS:
+                    logger.error(f"Inference worker {worker.process.pid} exited with code "
+                                 f"{worker.process.exitcode} after {MAX_RESTARTS} restarts; "
+                                 "leaving it down")
+                else:
+                    delay = min(MAX_RESTART_BACKOFF, RESTART_BACKOFF * 2 ** (worker.failures - 1))
+                    logger.error(f"Inference worker {worker.process.pid} exited with code "
+                                 f"{worker.process.exitcode}; restarting it in {delay:.1f}s")
+                    worker.restart_timer = threading.Timer(delay, self._restart, (worker,))
+                    worker.restart_timer.daemon = True
+                    worker.restart_timer.start()
+        for future, _, slot in lost:
+            worker.free_slots.put(slot)
+            future.set_exception(RuntimeError("Inference worker exited"))
+
+    def _restart(self, worker):
+        with self._pending_lock:
+            if self._closed:
+                return
+            worker.start()
+        self._wakeup.send(None)
+
+    def shutdown(self):
+        """Stop the workers and free their shared memory; safe to call twice."""
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for worker in self._workers:
+                if worker.restart_timer is not None:
+                    worker.restart_timer.cancel()
+                if worker.up:
+                    worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(self.timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        # The collector returns once every worker's pipe has reached EOF
+        self._wakeup.send(None)
+        self._collector.join()
+        self._wakeup.close()
+        self._wakeup_reader.close()
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, _, _ in pending.values():
+            future.set_exception(RuntimeError("Inference worker pool is shut down"))
+        for worker in self._workers:
+            worker.shm.close()
+            try:
+                worker.shm.unlink()
+            except FileNotFoundError:
+                pass
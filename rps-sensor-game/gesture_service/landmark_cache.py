@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from landmark_features import MIDDLE_MCP, WRIST
+
+
+def landmark_signature(points, tolerance=0.05):
+    """Quantized, wrist-relative key for a (21, 3) hand, including its size.
+
+    Landmarks are shifted so the wrist is the origin and divided by the
+    wrist to middle-knuckle distance, then rounded to ``tolerance`` of that
+    palm length. The rule-based scores depend on absolute fingertip
+    separations and palm normal length, so the palm length itself is kept
+    in the key as a log-scale bucket ``tolerance`` wide. Returns None for
+    degenerate hands.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    relative = points - points[WRIST]
+    palm_length = np.linalg.norm(relative[MIDDLE_MCP])
+    if not np.isfinite(palm_length) or palm_length < 1e-6:
+        return None
+    quantized = np.round(relative / (palm_length * tolerance))
+    scale_bucket = int(np.round(np.log(palm_length) / np.log1p(tolerance)))
+    return scale_bucket.to_bytes(4, 'little', signed=True) + quantized.astype(np.int16).tobytes()
+
+
+def feature_signature(features, tolerance=0.05):
+    """Key for a feature row, rounded to ``tolerance`` in each feature's own units."""
+    features = np.asarray(features, dtype=np.float64)
+    if not np.all(np.isfinite(features)):
+        return None
+    return np.round(features / tolerance).astype(np.int32).tobytes()
+
+
+class LandmarkCache:
+    """Bounded LRU cache of classification results keyed by a quantized signature.
+
+    ``signature(value, tolerance)`` turns whatever is classified into a
+    hashable key, or None to bypass the cache. It has to keep everything
+    the classifier looks at: values that share a key share a result, so
+    a coarse ``tolerance`` can still flip results for inputs right at a
+    decision threshold.
+    """
+
+    def __init__(self, max_size=4096, tolerance=0.05, signature=landmark_signature):
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.signature = signature
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, value, compute):
+        """Return the cached result for ``value`` or store ``compute(value)``."""
+        key = self.signature(value, self.tolerance)
+        if key is None:
+            return compute(value)
+
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = compute(value)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def get_or_compute_many(self, values, compute_batch):
+        """Like ``get_or_compute`` for a sequence, computing all misses in one call.
+
+        ``compute_batch`` takes a list of values and returns a list of results.
+        """
+        keys = [self.signature(value, self.tolerance) for value in values]
+        results = [None] * len(values)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                result = self._entries.get(key) if key is not None else None
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results[i] = result
+                else:
+                    if key is not None:
+                        self.misses += 1
+                    missing.append(i)
+
+        if missing:
+            computed = compute_batch([values[i] for i in missing])
+            with self._lock:
+                for i, result in zip(missing, computed):
+                    results[i] = result
+                    if keys[i] is None:
+                        continue
+                    self._entries[keys[i]] = result
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,135 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# MediaPipe hand landmark indices
+WRIST = 0
+THUMB_CMC, THUMB_MCP, THUMB_TIP = 1, 2, 4
+INDEX_MCP, INDEX_PIP, INDEX_TIP = 5, 6, 8
+MIDDLE_MCP, MIDDLE_PIP, MIDDLE_TIP = 9, 10, 12
+RING_MCP, RING_PIP, RING_TIP = 13, 14, 16
+PINKY_MCP, PINKY_PIP, PINKY_TIP = 17, 18, 20
+
+# (base, joint, tip) triples used for the extended/curled test, thumb first
+FINGER_JOINTS = np.array([
+    [THUMB_CMC, THUMB_MCP, THUMB_TIP],
+    [INDEX_MCP, INDEX_PIP, INDEX_TIP],
+    [MIDDLE_MCP, MIDDLE_PIP, MIDDLE_TIP],
+    [RING_MCP, RING_PIP, RING_TIP],
+    [PINKY_MCP, PINKY_PIP, PINKY_TIP]
+])
+
+# Every joint along each finger, as used by the ML feature vector
+HAND_JOINTS = np.array([
+    [0, 1, 2], [1, 2, 3], [2, 3, 4],  # Thumb
+    [0, 5, 6], [5, 6, 7], [6, 7, 8],  # Index
+    [0, 9, 10], [9, 10, 11], [10, 11, 12],  # Middle
+    [0, 13, 14], [13, 14, 15], [14, 15, 16],  # Ring
+    [0, 17, 18], [17, 18, 19], [18, 19, 20]  # Pinky
+])
+
+FINGER_TIPS = np.array([INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP])
+
+
+def landmarks_to_array(landmarks):
+    """Convert MediaPipe landmarks to a (21, 3) float array.
+
+    Accepts a ``NormalizedLandmarkList``, a sequence of landmarks with
+    ``x``/``y``/``z`` attributes, or anything already array-like.
+    """
+    if hasattr(landmarks, 'landmark'):
+        landmarks = landmarks.landmark
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float64, copy=False)
+    if len(landmarks) and hasattr(landmarks[0], 'x'):
+        return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float64)
+    return np.asarray(landmarks, dtype=np.float64)
+
+
+def _as_batch(points):
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    if points.shape[1:] != (NUM_LANDMARKS, 3):
+        raise ValueError(f"Expected landmarks of shape (21, 3) or (N, 21, 3), got {points.shape}")
+    return points
+
+
+def _vector_angles(v1, v2):
+    """Angle in degrees between paired vectors along the last axis."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosine = np.sum(v1 * v2, axis=-1) / (
+            np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1))
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+
+def joint_angles_2d(points):
+    """Planar angle at every joint in ``HAND_JOINTS``, shape (N, 15)."""
+    points = _as_batch(points)[..., :2]
+    p1 = points[:, HAND_JOINTS[:, 0]]
+    p2 = points[:, HAND_JOINTS[:, 1]]
+    p3 = points[:, HAND_JOINTS[:, 2]]
+    a = p3 - p2
+    b = p1 - p2
+    angles = np.abs(np.degrees(np.arctan2(a[..., 1], a[..., 0]) - np.arctan2(b[..., 1], b[..., 0])))
+    return np.where(angles > 180, 360 - angles, angles)
+
+
+def compute_features(points):
+    """Compute every geometric feature the rule-based classifier needs.
+
+    ``points`` is a (21, 3) or (N, 21, 3) landmark array. All results are
+    batched along the first axis:
+
+    - ``finger_angles`` (N, 5): 3D angle at the middle joint of each finger
+    - ``scissors_angle`` (N,): planar angle between index and middle fingers
+    - ``tip_separations`` (N, 3): planar distance between adjacent fingertips
+    - ``palm_normal`` (N, 3): cross product spanning the palm
+    """
+    points = _as_batch(points)
+
+    base = points[:, FINGER_JOINTS[:, 0]]
+    joint = points[:, FINGER_JOINTS[:, 1]]
+    tip = points[:, FINGER_JOINTS[:, 2]]
+    finger_angles = _vector_angles(base - joint, tip - joint)
+
+    index_dir = points[:, INDEX_TIP, :2] - points[:, INDEX_PIP, :2]
+    middle_dir = points[:, MIDDLE_TIP, :2] - points[:, MIDDLE_PIP, :2]
+    scissors_angle = _vector_angles(index_dir, middle_dir)
+
+    tips = points[:, FINGER_TIPS, :2]
+    tip_separations = np.linalg.norm(np.diff(tips, axis=1), axis=-1)
+
+    wrist = points[:, WRIST]
+    palm_normal = np.cross(points[:, MIDDLE_MCP] - wrist, points[:, PINKY_MCP] - wrist)
+
+    return {
+        'finger_angles': finger_angles,
+        'scissors_angle': scissors_angle,
+        'tip_separations': tip_separations,
+        'palm_normal': palm_normal
+    }
+
+
+def parse_landmarks(payload):
+    """Validate a client-supplied landmark payload and return a (21, 3) array.
+
+    ``payload`` is either packed little-endian float32 bytes (63 values in
+    MediaPipe landmark order) or a nested list of ``[x, y, z]`` triples.
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        if len(payload) != NUM_LANDMARKS * 3 * 4:
+            raise ValueError(f"Expected {NUM_LANDMARKS * 3 * 4} bytes of float32 landmarks, got {len(payload)}")
+        points = np.frombuffer(payload, dtype='<f4').reshape(NUM_LANDMARKS, 3)
+    else:
+        try:
+            points = np.asarray(payload, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Landmarks must be a list of [x, y, z] numbers") from None
+        if points.shape == (NUM_LANDMARKS * 3,):
+            points = points.reshape(NUM_LANDMARKS, 3)
+        if points.shape != (NUM_LANDMARKS, 3):
+            raise ValueError(f"Expected landmarks of shape (21, 3), got {points.shape}")
+    if not np.isfinite(points).all():
+        raise ValueError("Landmarks must be finite numbers")
+    return points.astype(np.float64)
@@ -0,0 +1,136 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from landmark_features import NUM_LANDMARKS
+
+MAGIC = b'RPSLMK01'
+# Magic, header size, record size, then zero padding up to HEADER_SIZE
+HEADER_FORMAT = '<8sII'
+HEADER_SIZE = 64
+
+GESTURE_CODES = {'rock': 0, 'paper': 1, 'scissors': 2}
+GESTURE_NAMES = {code: name for name, code in GESTURE_CODES.items()}
+
+# Where a record came from
+SOURCE_DETECT = 0
+SOURCE_TRAIN = 1
+
+# ``label`` is the training label and ``gesture`` the classifier output;
+# either is -1 when absent. ``session`` is the CRC32 of the session id.
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('session', '<u4'),
+    ('label', 'i1'),
+    ('gesture', 'i1'),
+    ('source', 'u1'),
+    ('reserved', 'u1'),
+    ('confidence', '<f4'),
+    ('landmarks', '<f4', (NUM_LANDMARKS, 3))
+])
+
+
+def _gesture_code(gesture):
+    return GESTURE_CODES.get(gesture, -1)
+
+
+def session_hash(session_id):
+    return zlib.crc32(session_id.encode()) if session_id else 0
+
+
+class LandmarkLog:
+    """Append-only binary log of fixed-size landmark records.
+
+    The file is a 64-byte header followed by ``RECORD_DTYPE`` records, so
+    it can be mapped straight into a structured array with
+    ``read_landmark_log``. Records are buffered and written in whole-record
+    ``O_APPEND`` writes, so several processes can share one log and a
+    crash leaves at most a truncated tail that readers ignore.
+    """
+
+    def __init__(self, path, flush_every=64, flush_interval=1.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._records = np.zeros(flush_every, RECORD_DTYPE)
+        self._count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._fd = self._open(path)
+
+    @staticmethod
+    def _open(path):
+        header = struct.pack(HEADER_FORMAT, MAGIC, HEADER_SIZE, RECORD_DTYPE.itemsize)
+        header = header.ljust(HEADER_SIZE, b'\0')
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+            os.write(fd, header)
+            return fd
+        except FileExistsError:
+            _read_header(path)
+            return os.open(path, os.O_WRONLY | os.O_APPEND)
+
+    def append(self, points, gesture=None, confidence=0.0, session_id=None,
+               label=None, source=SOURCE_DETECT):
+        """Buffer one (21, 3) landmark set with its metadata."""
+        with self._lock:
+            if self._fd is None:
+                return
+            record = self._records[self._count]
+            record['timestamp'] = time.time()
+            record['session'] = session_hash(session_id)
+            record['label'] = _gesture_code(label)
+            record['gesture'] = _gesture_code(gesture)
+            record['source'] = source
+            record['confidence'] = 0.0 if isinstance(confidence, str) else confidence
+            record['landmarks'] = points
+            self._count += 1
+            if (self._count == self.flush_every or
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def _flush(self):
+        if self._count:
+            os.write(self._fd, self._records[:self._count].tobytes())
+            self._count = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._flush()
+                os.close(self._fd)
+                self._fd = None
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a landmark log: header too short")
+    magic, header_size, record_size = struct.unpack_from(HEADER_FORMAT, header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a landmark log")
+    if record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has {record_size}-byte records, expected {RECORD_DTYPE.itemsize}")
+    return header_size
+
+
+def read_landmark_log(path):
+    """Map a landmark log as a read-only ``RECORD_DTYPE`` array without copying.
+
+    A partially written record at the end of the file is left out.
+    """
+    header_size = _read_header(path)
+    count = (os.path.getsize(path) - header_size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, RECORD_DTYPE)
+    return np.memmap(path, RECORD_DTYPE, mode='r', offset=header_size, shape=(count,))
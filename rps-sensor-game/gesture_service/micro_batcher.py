@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into batched calls.
+
+    Callers enqueue one feature row each and block on a future. A worker
+    thread takes the first waiting row, keeps collecting until it has
+    ``max_batch_size`` rows or the first row has waited ``max_wait_ms``,
+    then runs ``predict`` once on the stacked batch and hands each caller
+    its own result. ``predict`` takes an (N, features) array and returns a
+    sequence of N results.
+
+    ``on_batch(batch_size, queue_waits)`` is called after every batch with
+    the seconds each row spent queued.
+    """
+
+    def __init__(self, predict, max_batch_size=32, max_wait_ms=2.0, on_batch=None):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.on_batch = on_batch
+        self.stats = {'batches': 0, 'rows': 0, 'largest_batch': 0}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def submit(self, features):
+        """Queue one feature row and return a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((features, time.perf_counter(), future))
+        return future
+
+    def run(self, features):
+        """Predict one feature row as part of whatever batch it lands in."""
+        return self.submit(features).result()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            deadline = first[1] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        waits = [started - enqueued for _, enqueued, _ in batch]
+        try:
+            results = self.predict(np.stack([features for features, _, _ in batch]))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(batch)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        if self.on_batch is not None:
+            self.on_batch(len(batch), waits)
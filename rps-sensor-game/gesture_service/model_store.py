@@ -0,0 +1,130 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from numpy_classifier import NumpyClassifier
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PATTERN = re.compile(r'^model-v(\d+)\.npz$')
+LATEST_FILE = 'LATEST'
+
+
+class ModelStore:
+    """Directory of versioned classifier checkpoints.
+
+    Each checkpoint is a compressed ``model-v<version>.npz`` holding the
+    frozen weights, scaler statistics and label mapping. Files and the
+    ``LATEST`` pointer are written to a temporary name and renamed into
+    place, so readers never see a partial checkpoint.
+    """
+
+    def __init__(self, directory, keep=10):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, version):
+        return os.path.join(self.directory, f'model-v{version:06d}.npz')
+
+    def versions(self):
+        versions = []
+        for name in os.listdir(self.directory):
+            match = CHECKPOINT_PATTERN.match(name)
+            if match:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def latest_version(self):
+        """Version named by the ``LATEST`` pointer, or None if nothing was saved."""
+        try:
+            with open(os.path.join(self.directory, LATEST_FILE)) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save(self, classifier):
+        """Write ``classifier`` as the next version and point ``LATEST`` at it."""
+        with self._lock:
+            versions = self.versions()
+            version = (versions[-1] + 1) if versions else 1
+            self._write_atomic(self._path(version), classifier.save)
+            self._write_atomic(os.path.join(self.directory, LATEST_FILE),
+                               lambda f: f.write(str(version).encode()))
+            for old_version in versions[:max(0, len(versions) + 1 - self.keep)]:
+                os.remove(self._path(old_version))
+            return version
+
+    def load(self, version=None):
+        """Return ``(version, classifier)`` for ``version`` or the latest one."""
+        version = self.latest_version() if version is None else version
+        if version is None:
+            return None, None
+        return version, NumpyClassifier.load(self._path(version))
+
+
+def load_pinned(path, version=None):
+    """Return ``(version, classifier)`` from a frozen ``.npz`` or a store directory.
+
+    A directory gives ``version``, or its latest checkpoint when None; a
+    single file has no version. Offline tools use this to run one fixed
+    classifier instead of following hot reloads.
+    """
+    if not os.path.isdir(path):
+        return None, NumpyClassifier.load(path)
+    version, classifier = ModelStore(path).load(version)
+    if classifier is None:
+        raise ValueError(f"No checkpoints in {path}")
+    return version, classifier
+
+
+class ModelWatcher:
+    """Poll a ModelStore and hand newly published versions to ``on_update``."""
+
+    def __init__(self, store, on_update, interval=5.0, current_version=None):
+        self.store = store
+        self.on_update = on_update
+        self.interval = interval
+        self.current_version = current_version
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self):
+        """Load and publish the latest version if it changed; returns True if it did."""
+        version = self.store.latest_version()
+        if version is None or version == self.current_version:
+            return False
+        version, classifier = self.store.load(version)
+        self.on_update(version, classifier)
+        self.current_version = version
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error reloading model checkpoint: {str(e)}")
@@ -0,0 +1,94 @@
+import numpy as np
+
+GESTURES = ('rock', 'paper', 'scissors')
+
+
+class NumpyClassifier:
+    """Pure-NumPy inference for the gesture MLP.
+
+    Holds frozen dense-layer weights plus the scaler statistics, so serving
+    needs neither TensorFlow nor scikit-learn. Dropout is a no-op at
+    inference and is simply left out.
+    """
+
+    def __init__(self, layers, mean=None, scale=None, labels=GESTURES, scaler_samples=0):
+        # ``layers`` is a list of (kernel, bias, activation) with activation
+        # one of 'relu', 'softmax' or 'linear'
+        self.layers = [(np.asarray(kernel, np.float32), np.asarray(bias, np.float32), activation)
+                       for kernel, bias, activation in layers]
+        self.mean = None if mean is None else np.asarray(mean, np.float32)
+        self.scale = None if scale is None else np.asarray(scale, np.float32)
+        self.labels = tuple(labels)
+        # Samples behind mean/scale, so training can keep updating them
+        self.scaler_samples = int(scaler_samples)
+
+    @classmethod
+    def from_keras(cls, model, scaler=None):
+        """Freeze a trained Keras Sequential model and optional fitted StandardScaler."""
+        layers = []
+        for layer in model.layers:
+            weights = layer.get_weights()
+            if not weights:
+                continue
+            activation = layer.get_config().get('activation', 'linear')
+            layers.append((weights[0], weights[1], activation))
+        mean = scale = None
+        scaler_samples = 0
+        if scaler is not None and hasattr(scaler, 'mean_'):
+            mean, scale = scaler.mean_, scaler.scale_
+            scaler_samples = scaler.n_samples_seen_
+        return cls(layers, mean, scale, scaler_samples=scaler_samples)
+
+    def predict(self, features):
+        """Class probabilities for a (features,) row or an (N, features) batch."""
+        x = np.asarray(features, np.float32)
+        single = x.ndim == 1
+        if single:
+            x = x[np.newaxis]
+        if self.mean is not None:
+            x = (x - self.mean) / self.scale
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel + bias
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+            elif activation == 'softmax':
+                x = np.exp(x - x.max(axis=1, keepdims=True))
+                x /= x.sum(axis=1, keepdims=True)
+        return x[0] if single else x
+
+    def classify(self, features):
+        """Return ``(gesture, confidence)`` for one row, or lists of each for a batch."""
+        probabilities = self.predict(features)
+        if probabilities.ndim == 1:
+            index = int(np.argmax(probabilities))
+            return self.labels[index], float(probabilities[index])
+        indices = np.argmax(probabilities, axis=1)
+        return ([self.labels[i] for i in indices],
+                probabilities[np.arange(len(indices)), indices].astype(float).tolist())
+
+    def save(self, path):
+        """Write the frozen weights to a compressed ``.npz`` file or file object."""
+        arrays = {'labels': np.array(self.labels)}
+        for i, (kernel, bias, activation) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+            arrays[f'activation_{i}'] = np.array(activation)
+        if self.mean is not None:
+            arrays['mean'] = self.mean
+            arrays['scale'] = self.scale
+            arrays['scaler_samples'] = np.array(self.scaler_samples)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            layers = []
+            i = 0
+            while f'kernel_{i}' in data:
+                layers.append((data[f'kernel_{i}'], data[f'bias_{i}'], str(data[f'activation_{i}'])))
+                i += 1
+            mean = data['mean'] if 'mean' in data else None
+            scale = data['scale'] if 'scale' in data else None
+            labels = [str(label) for label in data['labels']] if 'labels' in data else GESTURES
+            scaler_samples = int(data['scaler_samples']) if 'scaler_samples' in data else 0
+        return cls(layers, mean, scale, labels, scaler_samples)
@@ -0,0 +1,127 @@
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayBuffer:
+    """Bounded, thread-safe store of labelled feature vectors."""
+
+    def __init__(self, capacity=5000):
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def add(self, features, label):
+        with self._lock:
+            self._samples.append((features, label))
+            self._pending.append(features)
+
+    def take_pending(self):
+        """Return feature vectors added since the last call."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return np.array(pending) if pending else None
+
+    @property
+    def pending(self):
+        """Number of samples not yet seen by a training round."""
+        with self._lock:
+            return len(self._pending)
+
+    def sample(self, batch_size, rng):
+        with self._lock:
+            count = len(self._samples)
+            if count == 0:
+                return None, None
+            indices = rng.choice(count, size=min(batch_size, count), replace=False)
+            batch = [self._samples[i] for i in indices]
+        features = np.array([features for features, _ in batch])
+        labels = np.array([label for _, label in batch])
+        return features, labels
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+
+class OnlineTrainer:
+    """Background worker that trains a detector from its replay buffer.
+
+    The worker wakes as soon as ``min_new_samples`` samples arrived, or after
+    ``interval`` seconds if there is anything new at all. It then updates
+    the scaler with the new samples, runs ``steps`` mini-batches against the
+    detector's training model and publishes a snapshot through
+    ``detector.swap_inference``. Detection never waits on training.
+    """
+
+    def __init__(self, detector, buffer, batch_size=32, steps=4,
+                 interval=2.0, min_new_samples=8):
+        self.detector = detector
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.steps = steps
+        self.interval = interval
+        self.min_new_samples = min_new_samples
+        self.rounds = 0
+        self._new_samples = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='online-trainer', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def notify(self):
+        """Record that a sample was added; wakes the worker once enough arrived."""
+        with self._lock:
+            self._new_samples += 1
+            if self._new_samples >= self.min_new_samples:
+                self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                ready = (self._new_samples >= self.min_new_samples or
+                         (not woken and self._new_samples > 0))
+                if ready:
+                    self._new_samples = 0
+            if ready and not self._stop.is_set():
+                try:
+                    self.train_round()
+                except Exception as e:
+                    logger.error(f"Error in online training round: {str(e)}")
+
+    def train_round(self):
+        """Run one scheduled round of mini-batch training and publish the result."""
+        model, scaler = self.detector.training_state()
+
+        pending = self.buffer.take_pending()
+        if pending is not None:
+            scaler.partial_fit(pending)
+
+        for _ in range(self.steps):
+            features, labels = self.buffer.sample(self.batch_size, self._rng)
+            if features is None:
+                return
+            model.train_on_batch(scaler.transform(features), labels)
+
+        self.detector.swap_inference(model, scaler)
+        self.rounds += 1
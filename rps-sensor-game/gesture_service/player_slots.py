@@ -0,0 +1,76 @@
+import numpy as np
+
+# Cost added when a hand's handedness differs from the slot's last one,
+# in the same normalized image units as the centroid distance; used only
+# to rank pairs already within ``max_distance``
+HANDEDNESS_PENALTY = 0.25
+
+
+class PlayerSlots:
+    """Assign the hands found in a frame to stable player slots.
+
+    Slot 0 is the leftmost player when slots are first filled. After that a
+    hand keeps the slot whose last centroid is nearest, with a penalty for a
+    handedness change, so players keep their slot when they cross or when
+    one briefly drops out. A slot is freed after ``max_missing`` frames
+    without a matching hand.
+    """
+
+    def __init__(self, num_players=2, max_distance=0.35, max_missing=15):
+        self.num_players = num_players
+        self.max_distance = max_distance
+        self.max_missing = max_missing
+        self._slots = [None] * num_players
+
+    def reset(self):
+        self._slots = [None] * self.num_players
+
+    def assign(self, hands):
+        """Map ``hands`` to slots.
+
+        ``hands`` is a list of ``(points, handedness)`` with (21, 3)
+        landmarks and a ``'Left'``/``'Right'`` label (or None). Returns a
+        list of length ``num_players`` holding the hand's index in
+        ``hands`` for each slot, or None for empty slots.
+        """
+        centroids = [points[:, :2].mean(axis=0) for points, _ in hands]
+        assigned = [None] * self.num_players
+        unmatched = set(range(len(hands)))
+
+        # Greedily match the cheapest (slot, hand) pairs first
+        pairs = []
+        for slot, previous in enumerate(self._slots):
+            if previous is None:
+                continue
+            for index in unmatched:
+                distance = float(np.linalg.norm(centroids[index] - previous['centroid']))
+                if distance > self.max_distance:
+                    continue
+                # The penalty only ranks candidates; it never widens the reach
+                cost = distance
+                if hands[index][1] != previous['handedness']:
+                    cost += HANDEDNESS_PENALTY
+                pairs.append((cost, slot, index))
+        for cost, slot, index in sorted(pairs):
+            if assigned[slot] is None and index in unmatched:
+                assigned[slot] = index
+                unmatched.discard(index)
+
+        # New hands fill free slots from left to right
+        free_slots = [slot for slot in range(self.num_players)
+                      if assigned[slot] is None and self._slots[slot] is None]
+        for slot, index in zip(free_slots, sorted(unmatched, key=lambda i: centroids[i][0])):
+            assigned[slot] = index
+
+        for slot, index in enumerate(assigned):
+            if index is not None:
+                self._slots[slot] = {
+                    'centroid': centroids[index],
+                    'handedness': hands[index][1],
+                    'missing': 0
+                }
+            elif self._slots[slot] is not None:
+                self._slots[slot]['missing'] += 1
+                if self._slots[slot]['missing'] > self.max_missing:
+                    self._slots[slot] = None
+        return assigned
@@ -0,0 +1,91 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+
+# (max frame dimension, JPEG quality, min milliseconds between frames),
+# from full quality to the cheapest setting offered under heavy load
+QUALITY_LEVELS = (
+    (640, 80, 33),
+    (480, 70, 50),
+    (360, 60, 80),
+    (240, 50, 125)
+)
+
+
+class QualityController:
+    """Load-aware hints telling clients how big and how often to send frames.
+
+    Load is the larger of the frame latency EMA over ``target_ms`` and the
+    in-flight frames over ``capacity``. Above 1 the controller steps to a
+    cheaper level, below ``relax_below`` it steps back up; either move
+    happens at most once per ``adjust_interval`` seconds so one slow frame
+    does not make clients flap.
+    """
+
+    def __init__(self, target_ms=50.0, capacity=4, alpha=0.2, relax_below=0.5,
+                 adjust_interval=1.0, levels=QUALITY_LEVELS):
+        self.target_ms = target_ms
+        self.capacity = capacity
+        self.alpha = alpha
+        self.relax_below = relax_below
+        self.adjust_interval = adjust_interval
+        self.levels = levels
+        self.level = 0
+        self.latency_ms = 0.0
+        self.in_flight = 0
+        self._last_adjusted = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        """Count a frame as in flight and fold its wall time into the latency EMA."""
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.latency_ms += self.alpha * (elapsed - self.latency_ms)
+                self._adjust(time.monotonic())
+
+    def load(self):
+        return max(self.latency_ms / self.target_ms, self.in_flight / self.capacity)
+
+    def _adjust(self, now):
+        if now - self._last_adjusted < self.adjust_interval:
+            return
+        load = self.load()
+        if load > 1.0 and self.level < len(self.levels) - 1:
+            self.level += 1
+            self._last_adjusted = now
+        elif load < self.relax_below and self.level > 0:
+            self.level -= 1
+            self._last_adjusted = now
+
+    def hints(self):
+        max_dimension, jpeg_quality, min_interval_ms = self.levels[self.level]
+        return {
+            'level': self.level,
+            'max_dimension': max_dimension,
+            'jpeg_quality': jpeg_quality,
+            'min_interval_ms': min_interval_ms
+        }
+
+    def downscale(self, frame, timings=None):
+        """Shrink ``frame`` so its longer side fits the current hint."""
+        max_dimension = self.levels[self.level][0]
+        height, width = frame.shape[:2]
+        if max(height, width) <= max_dimension:
+            return frame
+        start = time.perf_counter()
+        scale = max_dimension / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if timings is not None:
+            timings['resize_ms'] = (time.perf_counter() - start) * 1000
+        return frame
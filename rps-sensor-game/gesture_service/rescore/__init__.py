@@ -0,0 +1,9 @@
+"""Offline re-scoring of recorded rounds.
+
+Run from the ``gesture_service`` directory::
+
+    python -m rescore recordings/ --output rescored/ --target rules --workers 8
+"""
+
+from rescore.runner import GESTURES, TARGETS, completed_chunks, merge_parts, run_rescore
+from rescore.sources import Chunk, Recording, discover_recordings, iter_frames, split_recordings
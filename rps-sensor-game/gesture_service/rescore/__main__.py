@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+
+from rescore.runner import TARGETS, run_rescore
+from rescore.sources import discover_recordings, split_recordings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-run gesture classification over recorded rounds.')
+    parser.add_argument('inputs', nargs='+', help='Video files or directories of videos / frame images')
+    parser.add_argument('--output', required=True,
+                        help='Directory for checkpoints and results.npz; rerun with the same one to resume')
+    parser.add_argument('--target', choices=TARGETS, default='rules',
+                        help='rules: process_frame/determine_gesture, ml: EnhancedGestureDetector')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-frames', type=int, default=1800,
+                        help='Frames per work unit and checkpoint')
+    parser.add_argument('--stride', type=int, default=1, help='Classify every Nth frame')
+    parser.add_argument('--reduction', type=int, choices=(1, 2, 4, 8), default=1,
+                        help='Decode frame images at 1/N resolution')
+    parser.add_argument('--frame-gate', action='store_true',
+                        help='Keep static-frame skipping enabled (rules target)')
+    parser.add_argument('--classifier',
+                        default=os.environ.get('GESTURE_CLASSIFIER_PATH') or os.environ.get('MODEL_DIR'),
+                        help='Frozen .npz classifier or model store directory for the ml target '
+                             '(default: $GESTURE_CLASSIFIER_PATH, then $MODEL_DIR)')
+    args = parser.parse_args(argv)
+    if args.target == 'ml' and not args.classifier:
+        parser.error('--target ml needs --classifier, GESTURE_CLASSIFIER_PATH or MODEL_DIR')
+
+    recordings = discover_recordings(args.inputs)
+    if not recordings:
+        parser.error('No videos or frame images found')
+    chunks = split_recordings(recordings, args.chunk_frames)
+
+    def progress(chunk_id, frames, seconds, done, total):
+        fps = frames / seconds if seconds else 0.0
+        sys.stderr.write(f'[{done}/{total}] {chunk_id}: {frames} frames at {fps:.1f} fps\n')
+
+    path = run_rescore(chunks, args.output, args.target, args.workers, args.stride,
+                       args.reduction, args.frame_gate, args.classifier, progress)
+    sys.stdout.write(f'{path}\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
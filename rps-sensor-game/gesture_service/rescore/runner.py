@@ -0,0 +1,203 @@
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from rescore.sources import iter_frames
+
+GESTURES = ('rock', 'paper', 'scissors')
+TARGETS = ('rules', 'ml')
+MANIFEST_FILE = 'manifest.json'
+PARTS_DIR = 'parts'
+RESULTS_FILE = 'results.npz'
+
+# Set up once per worker process by _init_worker
+_classify = None
+_options = None
+
+
+def _rules_classifier(frame_gate):
+    import app
+    if not frame_gate:
+        app.frame_gate.diff_threshold = 0
+    # Ignore a GESTURE_CLASSIFIER=ml environment; this target is the rules
+    app.GESTURE_CLASSIFIER = 'rules'
+
+    def classify(frame, session_id):
+        gesture, confidence = app.process_frame(frame, session_id)
+        if confidence == "No hand detected":
+            return None, 0.0, False
+        if isinstance(confidence, str):
+            # Fail the chunk instead of checkpointing frames that errored
+            raise RuntimeError(confidence)
+        return gesture, confidence, True
+
+    def close(session_id):
+        app.tracker_pool.release(session_id)
+
+    return classify, close
+
+
+def _ml_classifier(classifier_path, version):
+    from enhanced_gesture_detector import EnhancedGestureDetector
+    from model_store import load_pinned
+    detector = EnhancedGestureDetector()
+    detector.swap_classifier(*load_pinned(classifier_path, version))
+
+    def classify(frame, session_id):
+        info = detector.detect_gesture(frame)
+        if not info['hand_detected']:
+            return None, 0.0, False
+        return info['gesture'], info['confidence'], True
+
+    return classify, lambda session_id: None
+
+
+def _init_worker(options):
+    global _classify, _options
+    _options = options
+    if options['target'] == 'rules':
+        _classify = _rules_classifier(options['frame_gate'])
+    else:
+        _classify = _ml_classifier(options['classifier'], options['classifier_version'])
+
+
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _run_chunk(chunk):
+    """Classify one chunk and write its columns to ``parts/<chunk_id>.npz``."""
+    classify, close = _classify
+    session_id = f'rescore-{chunk.chunk_id}'
+    frame_indices, timestamps, gestures, confidences, detected = [], [], [], [], []
+    start = time.perf_counter()
+    try:
+        for frame_index, timestamp_ms, frame in iter_frames(chunk, _options['stride'],
+                                                            _options['reduction']):
+            gesture, confidence, hand_detected = classify(frame, session_id)
+            frame_indices.append(frame_index)
+            timestamps.append(np.nan if timestamp_ms is None else timestamp_ms)
+            gestures.append(GESTURES.index(gesture) if gesture in GESTURES else -1)
+            confidences.append(confidence)
+            detected.append(hand_detected)
+    finally:
+        close(session_id)
+
+    columns = {
+        'frame_index': np.asarray(frame_indices, np.int32),
+        'timestamp_ms': np.asarray(timestamps, np.float64),
+        'gesture': np.asarray(gestures, np.int8),
+        'confidence': np.asarray(confidences, np.float32),
+        'hand_detected': np.asarray(detected, bool)
+    }
+    path = os.path.join(_options['output'], PARTS_DIR, f'{chunk.chunk_id}.npz')
+    _write_atomic(path, lambda f: np.savez_compressed(f, **columns))
+    return chunk.chunk_id, len(frame_indices), time.perf_counter() - start
+
+
+def _load_manifest(output, options, chunks):
+    """Create the run manifest, or check that a resumed run matches it."""
+    path = os.path.join(output, MANIFEST_FILE)
+    manifest = {
+        'options': {key: value for key, value in options.items() if key != 'output'},
+        'chunks': [chunk._asdict() for chunk in chunks]
+    }
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = json.load(f)
+        if existing != json.loads(json.dumps(manifest)):
+            raise ValueError(f"{output} holds a run with different inputs or options; "
+                             "use a new output directory")
+        return
+    _write_atomic(path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+
+def completed_chunks(output):
+    parts = os.path.join(output, PARTS_DIR)
+    if not os.path.isdir(parts):
+        return set()
+    return {os.path.splitext(name)[0] for name in os.listdir(parts) if name.endswith('.npz')}
+
+
+def run_rescore(chunks, output, target='rules', workers=None, stride=1, reduction=1,
+                frame_gate=False, classifier=None, progress=None):
+    """Classify every chunk across ``workers`` processes, skipping finished ones.
+
+    Each finished chunk is written to its own file, so an interrupted run
+    picks up where it stopped when started again with the same arguments.
+    ``progress(chunk_id, frames, seconds, done, total)`` is called as
+    chunks complete. Returns the path of the merged results.
+
+    The ``ml`` target requires ``classifier``, a frozen ``.npz`` or a model
+    store directory; a directory is pinned to its latest version, which is
+    recorded in the manifest with the path.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown rescore target: {target}")
+    classifier_version = None
+    if target == 'ml':
+        if not classifier:
+            raise ValueError("The ml target needs a frozen classifier to be reproducible")
+        from model_store import load_pinned
+        classifier_version, _ = load_pinned(classifier)
+    os.makedirs(os.path.join(output, PARTS_DIR), exist_ok=True)
+    options = {
+        'target': target,
+        'stride': stride,
+        'reduction': reduction,
+        'frame_gate': frame_gate,
+        'classifier': classifier if target == 'ml' else None,
+        'classifier_version': classifier_version,
+        'output': output
+    }
+    _load_manifest(output, options, chunks)
+
+    done = completed_chunks(output)
+    pending = [chunk for chunk in chunks if chunk.chunk_id not in done]
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        context = mp.get_context('spawn')
+        with context.Pool(min(workers, len(pending)), _init_worker, (options,)) as pool:
+            for chunk_id, frames, seconds in pool.imap_unordered(_run_chunk, pending):
+                done.add(chunk_id)
+                if progress is not None:
+                    progress(chunk_id, frames, seconds, len(done), len(chunks))
+    return merge_parts(chunks, output)
+
+
+def merge_parts(chunks, output):
+    """Concatenate chunk files into one columnar ``results.npz``.
+
+    Rows are ordered by recording and frame. ``recording`` indexes the
+    ``recordings`` path array and ``gesture`` indexes ``gestures``, with -1
+    for frames where nothing was recognized.
+    """
+    recordings = sorted({chunk.path for chunk in chunks})
+    recording_index = {path: i for i, path in enumerate(recordings)}
+    columns = {name: [] for name in ('recording', 'frame_index', 'timestamp_ms',
+                                     'gesture', 'confidence', 'hand_detected')}
+    for chunk in sorted(chunks, key=lambda c: (c.path, c.start)):
+        with np.load(os.path.join(output, PARTS_DIR, f'{chunk.chunk_id}.npz')) as part:
+            rows = len(part['frame_index'])
+            columns['recording'].append(np.full(rows, recording_index[chunk.path], np.int32))
+            for name in ('frame_index', 'timestamp_ms', 'gesture', 'confidence', 'hand_detected'):
+                columns[name].append(part[name])
+
+    arrays = {name: np.concatenate(values) for name, values in columns.items() if values}
+    arrays['recordings'] = np.array(recordings)
+    arrays['gestures'] = np.array(GESTURES)
+    path = os.path.join(output, RESULTS_FILE)
+    _write_atomic(path, lambda f: np.savez_compressed(f, **arrays))
+    return path
@@ -0,0 +1,107 @@
+import os
+from collections import namedtuple
+
+import cv2
+
+from frame_ingest import DECODE_FLAGS
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# A recording is a video file or a directory of frame images; ``frames``
+# is the frame count (approximate for some video containers)
+Recording = namedtuple('Recording', ['path', 'kind', 'frames'])
+
+# A contiguous ``[start, stop)`` frame range of one recording
+Chunk = namedtuple('Chunk', ['chunk_id', 'path', 'kind', 'start', 'stop'])
+
+
+def _image_files(directory):
+    return sorted(name for name in os.listdir(directory)
+                  if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+
+
+def discover_recordings(paths):
+    """Expand files and directories into recordings.
+
+    Video files are recordings on their own. Any directory that directly
+    holds frame images is one recording, its frames in file name order.
+    Directories are searched recursively.
+    """
+    recordings = []
+    for path in paths:
+        if os.path.isfile(path):
+            if os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS:
+                recordings.append(_video_recording(path))
+            continue
+        for directory, _, names in os.walk(path):
+            images = _image_files(directory)
+            if images:
+                recordings.append(Recording(directory, 'images', len(images)))
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                    recordings.append(_video_recording(os.path.join(directory, name)))
+    return sorted(recordings)
+
+
+def _video_recording(path):
+    capture = cv2.VideoCapture(path)
+    try:
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+    return Recording(path, 'video', max(frames, 0))
+
+
+def split_recordings(recordings, chunk_frames=1800):
+    """Cut recordings into chunks of at most ``chunk_frames`` frames.
+
+    Chunks are the unit of parallelism and of checkpointing. Tracking
+    restarts at each chunk boundary, so chunks should span many frames.
+    """
+    chunks = []
+    for index, recording in enumerate(recordings):
+        for start in range(0, max(recording.frames, 1), chunk_frames):
+            stop = min(start + chunk_frames, recording.frames)
+            if recording.kind == 'video' and stop == recording.frames:
+                # Frame counts can be short; the last chunk reads to the end
+                stop = None
+            chunk_id = f'{index:05d}-{start:09d}'
+            chunks.append(Chunk(chunk_id, recording.path, recording.kind, start, stop))
+    return chunks
+
+
+def iter_frames(chunk, stride=1, reduction=1):
+    """Yield ``(frame_index, timestamp_ms, frame)`` for every ``stride``-th frame of a chunk.
+
+    The stride counts from the start of the recording, not of the chunk,
+    so the frames kept do not depend on ``chunk_frames``. Frames are BGR
+    arrays. Skipped video frames are only grabbed, not decoded.
+    ``reduction`` decodes image files at 1/2, 1/4 or 1/8 size.
+    """
+    if chunk.kind == 'images':
+        names = _image_files(chunk.path)[chunk.start:chunk.stop]
+        flag = DECODE_FLAGS[reduction]
+        for offset in range(-chunk.start % stride, len(names), stride):
+            frame = cv2.imread(os.path.join(chunk.path, names[offset]), flag)
+            if frame is not None:
+                yield chunk.start + offset, None, frame
+        return
+
+    capture = cv2.VideoCapture(chunk.path)
+    try:
+        if chunk.start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, chunk.start)
+        index = chunk.start
+        while chunk.stop is None or index < chunk.stop:
+            if index % stride:
+                if not capture.grab():
+                    break
+            else:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield index, capture.get(cv2.CAP_PROP_POS_MSEC), frame
+            index += 1
+    finally:
+        capture.release()
@@ -0,0 +1,108 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+# Stage timings are reported in milliseconds by the pipeline
+STAGE_NAMES = {
+    'read_ms': 'read',
+    'decode_ms': 'imdecode',
+    'resize_ms': 'resize',
+    'gate_ms': 'frame_gate',
+    'convert_ms': 'cvtColor',
+    'detect_ms': 'hands_process',
+    'features_ms': 'features',
+    'classify_ms': 'determine_gesture'
+}
+
+registry = CollectorRegistry()
+
+REQUEST_LATENCY = Histogram(
+    'gesture_request_latency_seconds', 'End-to-end request latency',
+    ['endpoint'], registry=registry,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+STAGE_LATENCY = Histogram(
+    'gesture_stage_latency_seconds', 'Latency of each frame processing stage',
+    ['stage'], registry=registry,
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+OUTCOMES = Counter(
+    'gesture_outcomes_total', 'Frame classification outcomes', ['outcome'], registry=registry
+)
+ML_BATCH_SIZE = Histogram(
+    'gesture_ml_batch_size', 'Rows per micro-batched classifier call', registry=registry,
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+ML_QUEUE_WAIT = Histogram(
+    'gesture_ml_queue_wait_seconds', 'Time a row waited for its micro-batch to run', registry=registry,
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025)
+)
+IN_FLIGHT = Gauge(
+    'gesture_requests_in_flight', 'Requests currently being handled', registry=registry
+)
+
+# Pre-bind label children so the hot path skips the label lookup
+_stage_children = {key: STAGE_LATENCY.labels(stage) for key, stage in STAGE_NAMES.items()}
+_outcome_children = {
+    outcome: OUTCOMES.labels(outcome)
+    for outcome in ('recognized', 'no_hand', 'not_recognized', 'error')
+}
+
+
+def observe_timings(timings):
+    """Record a pipeline ``timings`` dict (milliseconds per stage)."""
+    if not METRICS_ENABLED:
+        return
+    for key, value in timings.items():
+        child = _stage_children.get(key)
+        if child is not None:
+            child.observe(value / 1000)
+
+
+def record_outcome(gesture, confidence):
+    """Count a ``process_frame``-style result by outcome."""
+    if not METRICS_ENABLED:
+        return
+    if gesture is not None:
+        outcome = 'recognized'
+    elif confidence == "No hand detected":
+        outcome = 'no_hand'
+    elif isinstance(confidence, str):
+        outcome = 'error'
+    else:
+        outcome = 'not_recognized'
+    _outcome_children[outcome].inc()
+
+
+def observe_batch(batch_size, queue_waits):
+    """Record one micro-batch of the ML classifier."""
+    if not METRICS_ENABLED:
+        return
+    ML_BATCH_SIZE.observe(batch_size)
+    for wait in queue_waits:
+        ML_QUEUE_WAIT.observe(wait)
+
+
+class ServiceCollector:
+    """Reads gauges and counters owned by other components at scrape time."""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    def collect(self):
+        values = self.sources()
+        for name, (kind, description, value) in values.items():
+            family = GaugeMetricFamily if kind == 'gauge' else CounterMetricFamily
+            yield family(name, description, value=value)
+
+
+def register_collector(sources):
+    """Expose ``sources() -> {name: (kind, description, value)}`` on /metrics."""
+    registry.register(ServiceCollector(sources))
+
+
+def render():
+    return generate_latest(registry)
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class TrackerPool:
+    """Session-keyed pool of MediaPipe hand trackers.
+
+    Each session gets its own ``Hands`` instance so tracking state never
+    leaks between players. Idle sessions are evicted after ``idle_timeout``
+    seconds and the least recently used session is dropped once the pool
+    holds ``max_size`` trackers.
+    """
+
+    def __init__(self, max_size=16, idle_timeout=300.0, factory=None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._factory = factory or self._create_tracker
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_tracker(max_num_hands=1):
+        # Imported on first use so the service starts without loading MediaPipe
+        import mediapipe as mp
+        return mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.7
+        )
+
+    @contextmanager
+    def session(self, session_id):
+        """Yield ``(tracker, state)`` for a session.
+
+        ``state`` is a per-session dict for callers to keep data that must
+        live and die with the tracker, such as the previous frame.
+        """
+        while True:
+            entry = self._get_entry(session_id)
+            entry['lock'].acquire()
+            if not entry['closed']:
+                break
+            # Evicted between lookup and lock; fetch a fresh tracker
+            entry['lock'].release()
+        try:
+            entry['last_used'] = time.monotonic()
+            yield entry['tracker'], entry['state']
+        finally:
+            entry['last_used'] = time.monotonic()
+            entry['lock'].release()
+
+    def _get_entry(self, session_id):
+        with self._lock:
+            evicted = self._pop_idle()
+            entry = self._trackers.get(session_id)
+            if entry is not None:
+                self._trackers.move_to_end(session_id)
+        self._close_all(evicted)
+        if entry is not None:
+            return entry
+
+        # Built outside the pool lock so a slow MediaPipe graph setup does
+        # not stall frames for every other session
+        new_entry = {
+            'tracker': self._factory(),
+            'lock': threading.Lock(),
+            'last_used': time.monotonic(),
+            'state': {},
+            'closed': False
+        }
+        evicted = []
+        with self._lock:
+            entry = self._trackers.get(session_id)
+            if entry is None:
+                while len(self._trackers) >= self.max_size:
+                    evicted.append(self._trackers.popitem(last=False)[1])
+                entry = self._trackers[session_id] = new_entry
+            else:
+                # Another request for this session got there first
+                self._trackers.move_to_end(session_id)
+                evicted.append(new_entry)
+        self._close_all(evicted)
+        return entry
+
+    def _pop_idle(self):
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, entry in self._trackers.items()
+            if now - entry['last_used'] > self.idle_timeout
+        ]
+        return [self._trackers.pop(session_id) for session_id in expired]
+
+    def _close(self, entry):
+        # Wait for any in-flight frame on this tracker before closing it
+        with entry['lock']:
+            entry['closed'] = True
+            close = getattr(entry['tracker'], 'close', None)
+            if close is not None:
+                close()
+
+    def _close_all(self, entries):
+        for entry in entries:
+            self._close(entry)
+
+    def release(self, session_id):
+        """Drop a session's tracker, e.g. when a player leaves."""
+        with self._lock:
+            entry = self._trackers.pop(session_id, None)
+        if entry is not None:
+            self._close(entry)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._trackers)